@@ -1,33 +1,218 @@
 """Module to parse config file."""
 
-import configparser
-from collections import deque
+import array
+import copy
+import os
 from logging import warning
 
-from data.models import str_to_showtype
 
-# Variable used to aid in ratelimiting api calls
-api_call_times = deque()
+class ApiCallTimes:
+    """Ring buffer of the times of the most recent api calls, used for ratelimiting."""
+
+    def __init__(self, size=60):
+        self.times = array.array("q", [0] * max(size, 1))
+        self.head = 0
+
+    def __len__(self):
+        return len(self.times)
+
+    def resize(self, size):
+        """Remember up to size calls, keeping the most recent ones already recorded."""
+
+        size = max(size, 1)
+        if size == len(self.times):
+            return
+
+        # Reorder oldest to newest, then drop or pad at the old end
+        ordered = self.times[self.head :] + self.times[: self.head]
+        if size < len(ordered):
+            ordered = ordered[-size:]
+        else:
+            ordered = array.array("q", [0] * (size - len(ordered))) + ordered
+        self.times[:] = ordered
+        self.head = 0
+
+    def oldest(self):
+        """Return the monotonic time in ns of the oldest call, 0 if there isn't one."""
+
+        return self.times[self.head]
+
+    def record(self, timestamp):
+        """Overwrite the oldest call with the time of a new call."""
+
+        self.times[self.head] = timestamp
+        self.head = (self.head + 1) % len(self.times)
+
+
+# Variables used to aid in ratelimiting api calls. The ratelimit option is a number of
+# calls per minute, so the window that api_call_times covers is always one minute no
+# matter what ratelimit is set to; only the number of calls remembered changes.
+api_call_times = ApiCallTimes()
 min_ns = 60 * 1000000000
 
+# Parsed Config objects keyed by (path, mtime, size) of the file they came from
+_config_cache = dict()
+
+
+_BOOLEAN_STATES = {
+    "1": True,
+    "yes": True,
+    "true": True,
+    "on": True,
+    "0": False,
+    "no": False,
+    "false": False,
+    "off": False,
+}
+
+
+def _read_ini(text):
+    """
+    Split the contents of an ini file into a dict of sections, each holding a dict of
+    its options. Comments and multi-line values follow the same rules as configparser,
+    but there is no interpolation or DEFAULT section handling. Surrounding quotes are
+    stripped from values.
+    """
+
+    sections = dict()
+    section = None
+    key = None
+    indent = 0
+
+    for line in text.splitlines():
+        s = line.strip()
+        if not s:
+            # Blank lines inside a multi-line value are kept
+            if key is not None:
+                section[key].append("")
+            continue
+        if s[0] in "#;":
+            continue
+
+        # Indented lines continue the value of the previous option
+        cur_indent = len(line) - len(line.lstrip())
+        if key is not None and cur_indent > indent:
+            section[key].append(s)
+            continue
+
+        indent = cur_indent
+        key = None
+        if s[0] == "[" and s[-1] == "]":
+            section = sections.setdefault(s[1:-1], dict())
+        elif section is not None:
+            k, sep, v = s.partition("=")
+            if ":" in k:
+                k, sep, v = s.partition(":")
+            if sep and k.strip():
+                key = k.strip().lower()
+                section[key] = [v.strip()]
+
+    return {
+        name: {k: "\n".join(v).rstrip().strip('"') for k, v in options.items()}
+        for name, options in sections.items()
+    }
+
+
+def _get(sec, key, default=None):
+    """Fetch a string option from a parsed section."""
+
+    return sec.get(key, default)
+
+
+def _getint(sec, key, default=None):
+    """Fetch an integer option from a parsed section."""
 
-class WhitespaceFriendlyConfigParser(configparser.ConfigParser):
-    """Config file parser to deal with extra whitespace."""
+    value = sec.get(key)
+    if value is None:
+        return default
+    return int(value)
 
-    def get(self, section, option, *args, **kwargs):
-        val = super().get(section, option, *args, **kwargs)
-        return val.strip('"')
+
+def _getbool(sec, key, default=None):
+    """Fetch a boolean option from a parsed section."""
+
+    value = sec.get(key)
+    if value is None:
+        return default
+    try:
+        return _BOOLEAN_STATES[value.lower()]
+    except KeyError:
+        raise ValueError("Not a boolean: {}".format(value)) from None
 
 
 class Config:
     """Object containing values from parsed config file."""
 
+    __slots__ = (
+        # defined at runtime
+        "module",
+        "log_dir",
+        # data section
+        "database",
+        "full_sync",
+        # options section
+        "debug",
+        "ratelimit",
+        "new_show_types",
+        "countries",
+        "submit",
+        "submit_image",
+        "overwrite_url",
+        "days",
+        "episode_retention",
+        "show_discovery",
+        "nsfw_discovery",
+        "discovery_enabled",
+        "min_upvotes",
+        "min_comments",
+        "engagement_lag",
+        "disable_inactive",
+        # lemmy section
+        "l_community",
+        "l_instance",
+        "l_username",
+        "l_password",
+        "l_language_id",
+        # post section
+        "post_title",
+        "post_title_with_en",
+        "movie_title",
+        "movie_title_with_en",
+        "delay",
+        "post_body",
+        "movie_post_body",
+        "user_thread_comment",
+        "post_formats",
+        # summary section
+        "summary_days",
+        "pin_summary",
+        "summary_title",
+        "summary_body",
+        "alphabetize",
+        # requestable section
+        "template_file",
+        "output_filename",
+        # wiki section
+        "wiki_template",
+        "wiki_folder",
+        "wiki_show_heading",
+        "wiki_show_heading_with_en",
+        # megathread section
+        "megathread_episodes",
+        "megathread_title",
+        "megathread_title_with_en",
+        "megathread_body",
+        "megathread_comment",
+    )
+
     def __init__(self):
         # defined at runtime
         self.module = None
+        self.log_dir = None
 
         # data section
         self.database = None
+        self.full_sync = False
 
         # options section
         self.debug = False
@@ -90,111 +275,166 @@ class Config:
         self.megathread_comment = None
 
 
+def _get_formats(sec, key=None, default=None):  # pylint: disable=unused-argument
+    """Collect all the format_ options of the post section into a dict."""
+
+    return {k[7:]: v for k, v in sec.items() if k.startswith("format_") and len(k) > 7}
+
+
+_GETTERS = {"str": _get, "int": _getint, "bool": _getbool, "formats": _get_formats}
+
+
+def _read_option(sec, section, key, kind, default):
+    """Read and convert one option, naming it in the error if its value is invalid."""
+
+    try:
+        return _GETTERS[kind](sec, key, default)
+    except ValueError as e:
+        raise ValueError("[{}] {}: {}".format(section, key, e)) from None
+
+
+# (section, option, Config attribute, type, default) for every simple option
+_SCHEMA = (
+    ("data", "database", "database", "str", None),
+    ("data", "full_sync", "full_sync", "bool", False),
+    ("lemmy", "community", "l_community", "str", None),
+    ("lemmy", "instance", "l_instance", "str", None),
+    ("lemmy", "username", "l_username", "str", None),
+    ("lemmy", "password", "l_password", "str", None),
+    ("lemmy", "language_id", "l_language_id", "int", None),
+    ("options", "ratelimit", "ratelimit", "int", 60),
+    ("options", "debug", "debug", "bool", False),
+    ("options", "submit", "submit", "bool", True),
+    ("options", "days", "days", "int", 7),
+    ("options", "episode_retention", "episode_retention", "int", 30),
+    ("options", "show_discovery", "show_discovery", "bool", False),
+    ("options", "nsfw_discovery", "nsfw_discovery", "bool", False),
+    ("options", "discovery_enabled", "discovery_enabled", "bool", False),
+    ("options", "min_upvotes", "min_upvotes", "int", 1),
+    ("options", "min_comments", "min_comments", "int", 0),
+    ("options", "engagement_lag", "engagement_lag", "int", 24),
+    ("options", "disable_inactive", "disable_inactive", "bool", False),
+    ("options", "overwrite_url", "overwrite_url", "bool", False),
+    ("options", "submit_image", "submit_image", "str", None),
+    ("post", "title", "post_title", "str", None),
+    ("post", "title_with_en", "post_title_with_en", "str", None),
+    ("post", "movie_title", "movie_title", "str", None),
+    ("post", "movie_title_with_en", "movie_title_with_en", "str", None),
+    ("post", "delay", "delay", "int", 60),
+    ("post", "post_body", "post_body", "str", None),
+    ("post", "movie_post_body", "movie_post_body", "str", None),
+    ("post", "user_thread_comment", "user_thread_comment", "str", None),
+    ("summary", "summary_days", "summary_days", "int", 8),
+    ("summary", "pin_summary", "pin_summary", "bool", False),
+    ("summary", "summary_title", "summary_title", "str", None),
+    ("summary", "summary_body", "summary_body", "str", None),
+    ("summary", "alphabetize", "alphabetize", "bool", False),
+    ("requestable", "template_file", "template_file", "str", None),
+    ("requestable", "output_filename", "output_filename", "str", "requestable.md"),
+    ("wiki", "wiki_template", "wiki_template", "str", "season_template.md"),
+    ("wiki", "wiki_folder", "wiki_folder", "str", "wiki"),
+    ("wiki", "wiki_show_heading", "wiki_show_heading", "str", None),
+    ("wiki", "wiki_show_heading_with_en", "wiki_show_heading_with_en", "str", None),
+    ("megathread", "megathread_episodes", "megathread_episodes", "int", 12),
+    ("megathread", "megathread_title", "megathread_title", "str", None),
+    ("megathread", "megathread_title_with_en", "megathread_title_with_en", "str", None),
+    ("megathread", "megathread_body", "megathread_body", "str", None),
+    ("megathread", "megathread_comment", "megathread_comment", "str", None),
+    ("post", None, "post_formats", "formats", None),
+)
+
+
+def _copy_config(config):
+    """Copy a cached Config so changes to the copy don't leak back into the cache."""
+
+    other = Config.__new__(Config)
+    for attr in Config.__slots__:
+        # Slots that were never set are skipped rather than copied as missing
+        try:
+            value = object.__getattribute__(config, attr)
+        except AttributeError:
+            continue
+        # Lists and dicts like new_show_types and post_formats are mutable
+        if isinstance(value, (list, dict)):
+            value = copy.copy(value)
+        object.__setattr__(other, attr, value)
+    return other
+
+
 def from_file(file_path):
     """Parse a given config file and create a Config object."""
 
-    if file_path.find(".") < 0:
+    if not os.path.splitext(file_path)[1]:
         file_path += ".ini"
 
-    parsed = WhitespaceFriendlyConfigParser()
-    success = parsed.read(file_path, encoding="utf-8")
-    if len(success) == 0:
+    # Stat and read through the same file descriptor, and reuse the previous result if
+    # the file hasn't changed since it was parsed
+    file_path = os.path.abspath(file_path)
+    try:
+        with open(file_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            cache_key = (file_path, stat.st_mtime_ns, stat.st_size)
+            if cache_key in _config_cache:
+                return _copy_config(_config_cache[cache_key])
+
+            text = f.read().decode("utf-8")
+    except (OSError, UnicodeDecodeError):
         print("Failed to load config file")
         return None
 
-    config = Config()
+    parsed = _read_ini(text)
 
-    if "data" in parsed:
-        sec = parsed["data"]
-        config.database = sec.get("database", None)
+    config = Config()
 
-    if "lemmy" in parsed:
-        sec = parsed["lemmy"]
-        config.l_community = sec.get("community", None)
-        config.l_instance = sec.get("instance", None)
-        config.l_username = sec.get("username", None)
-        config.l_password = sec.get("password", None)
-        config.l_language_id = sec.getint("language_id", None)
+    try:
+        for section, key, attr, kind, default in _SCHEMA:
+            if section in parsed:
+                sec = parsed[section]
+                setattr(config, attr, _read_option(sec, section, key, kind, default))
+    except ValueError as e:
+        print("Invalid config file option {}".format(e))
+        return None
 
     if "options" in parsed:
         sec = parsed["options"]
-        config.ratelimit = sec.getint("ratelimit", 60)
-        global api_call_times  # pylint: disable=global-statement
-        api_call_times = deque(maxlen=config.ratelimit)
-        config.debug = sec.getboolean("debug", False)
-        config.submit = sec.getboolean("submit", True)
-        config.days = sec.getint("days", 7)
-        config.episode_retention = sec.getint("episode_retention", 30)
-        config.show_discovery = sec.getboolean("show_discovery", False)
-        config.nsfw_discovery = sec.getboolean("nsfw_discovery", False)
-        config.discovery_enabled = sec.getboolean("discovery_enabled", False)
-        config.min_upvotes = sec.getint("min_upvotes", 1)
-        config.min_comments = sec.getint("min_comments", 0)
-        config.engagement_lag = sec.getint("engagement_lag", 24)
-        config.disable_inactive = sec.getboolean("disable_inactive", False)
-        config.overwrite_url = sec.getboolean("overwrite_url", False)
-
-        config.submit_image = sec.get("submit_image", None)
+        api_call_times.resize(config.ratelimit)
+
         if config.submit_image not in ["banner", "cover"]:
             config.submit_image = None
 
-        config.new_show_types.extend(
-            map(
-                lambda s: str_to_showtype(s.strip()),
-                sec.get("new_show_types", "tv ona").split(" "),
-            )
+        from data.models import (  # pylint: disable=import-outside-toplevel
+            str_to_showtype,
         )
 
-        config.countries.extend(
-            map(
-                lambda s: s.strip(),
-                sec.get("countries", "JP").split(" "),
-            )
+        config.new_show_types.extend(
+            str_to_showtype(s) for s in _get(sec, "new_show_types", "tv ona").split()
         )
+        config.countries.extend(_get(sec, "countries", "JP").split())
+
+    # Only keep the most recent version of each file around
+    for stale in [k for k in _config_cache if k[0] == file_path]:
+        del _config_cache[stale]
+    _config_cache[cache_key] = config
 
-    if "post" in parsed:
-        sec = parsed["post"]
-        config.post_title = sec.get("title", None)
-        config.post_title_with_en = sec.get("title_with_en", None)
-        config.movie_title = sec.get("movie_title", None)
-        config.movie_title_with_en = sec.get("movie_title_with_en", None)
-        config.delay = sec.getint("delay", 60)
-        config.post_body = sec.get("post_body", None)
-        config.movie_post_body = sec.get("movie_post_body", None)
-        config.user_thread_comment = sec.get("user_thread_comment", None)
-        for key in sec:
-            if key.startswith("format_") and len(key) > 7:
-                config.post_formats[key[7:]] = sec[key]
-
-    if "summary" in parsed:
-        sec = parsed["summary"]
-        config.summary_days = sec.getint("summary_days", 8)
-        config.pin_summary = sec.getboolean("pin_summary", False)
-        config.summary_title = sec.get("summary_title", None)
-        config.summary_body = sec.get("summary_body", None)
-        config.alphabetize = sec.getboolean("alphabetize", False)
-
-    if "requestable" in parsed:
-        sec = parsed["requestable"]
-        config.template_file = sec.get("template_file", None)
-        config.output_filename = sec.get("output_filename", "requestable.md")
-
-    if "wiki" in parsed:
-        sec = parsed["wiki"]
-        config.wiki_template = sec.get("wiki_template", "season_template.md")
-        config.wiki_folder = sec.get("wiki_folder", "wiki")
-        config.wiki_show_heading = sec.get("wiki_show_heading", None)
-        config.wiki_show_heading_with_en = sec.get("wiki_show_heading_with_en", None)
-
-    if "megathread" in parsed:
-        sec = parsed["megathread"]
-        config.megathread_episodes = sec.getint("megathread_episodes", 12)
-        config.megathread_title = sec.get("megathread_title", None)
-        config.megathread_title_with_en = sec.get("megathread_title_with_en", None)
-        config.megathread_body = sec.get("megathread_body", None)
-        config.megathread_comment = sec.get("megathread_comment", None)
-
-    return config
+    return _copy_config(config)
+
+
+from_file.cache_clear = _config_cache.clear
+
+
+# Options that must be set, and the error reported by validate if they aren't
+_REQUIRED = (
+    ("database", "database missing"),
+    ("l_community", "community missing"),
+    ("l_instance", "lemmy instance missing"),
+    ("l_username", "lemmy username missing"),
+    ("l_password", "lemmy password missing"),
+    ("post_title", "post title missing"),
+    ("post_body", "post body missing"),
+    ("megathread_title", "megathread title missing"),
+    ("megathread_body", "megathread body missing"),
+    ("megathread_comment", "megathread comment missing"),
+)
 
 
 def validate(config):
@@ -209,30 +449,11 @@ def validate(config):
             string      describes part of config that is incorrect
     """
 
-    def is_bad_str(s):
-        return s is None or len(s) == 0
-
-    if is_bad_str(config.database):
-        return "database missing"
     if config.ratelimit < 0:
         warning("Rate limit can't be negative, defaulting to 60")
         config.ratelimit = 60
-    if is_bad_str(config.l_community):
-        return "community missing"
-    if is_bad_str(config.l_instance):
-        return "lemmy instance missing"
-    if is_bad_str(config.l_username):
-        return "lemmy username missing"
-    if is_bad_str(config.l_password):
-        return "lemmy password missing"
-    if is_bad_str(config.post_title):
-        return "post title missing"
-    if is_bad_str(config.post_body):
-        return "post body missing"
-    if is_bad_str(config.megathread_title):
-        return "megathread title missing"
-    if is_bad_str(config.megathread_body):
-        return "megathread body missing"
-    if is_bad_str(config.megathread_comment):
-        return "megathread comment missing"
+
+    for attr, message in _REQUIRED:
+        if not getattr(config, attr):
+            return message
     return False
@@ -6,10 +6,11 @@ import sqlite3
 import re
 import time
 
-from functools import wraps
+from contextlib import contextmanager
+from functools import lru_cache, wraps
 from logging import error, exception, debug
-from typing import Optional, List
-from unidecode import unidecode
+from typing import Optional, List, Set
+from unicodedata import normalize
 
 from .models import (
     ShowType,
@@ -24,16 +25,45 @@ from .models import (
 )
 
 
-def open_database(the_database):
-    """Opens the sqlite file and enforces foreign keys."""
+def open_database(the_database, full_sync=False):
+    """
+    Opens the sqlite file, enforces foreign keys and switches it to write-ahead
+    logging.
+
+    Parameters:
+        the_database - Path to the sqlite file
+        full_sync - If True, fsync on every commit instead of only at checkpoints
+    """
 
     try:
-        db = sqlite3.connect(the_database)
+        # Room for every statement in this module so none get re-prepared. Modules run
+        # from separate cron jobs can overlap, so wait out the other's write lock
+        # rather than failing after the default 5 seconds.
+        db = sqlite3.connect(the_database, timeout=30.0, cached_statements=256)
         db.execute("PRAGMA foreign_keys=ON")
+        # Returns the mode actually in use, e.g. "memory" for in-memory databases
+        journal_mode = db.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if journal_mode != "wal":
+            debug("Database journal mode is {}, not wal".format(journal_mode))
+        # Truncate the wal file back to 64 MB after checkpoints, a large show sync
+        # would otherwise leave it at its peak size on disk
+        db.execute("PRAGMA journal_size_limit=67108864")
+        db.execute("PRAGMA synchronous={}".format("FULL" if full_sync else "NORMAL"))
+        db.execute("PRAGMA temp_store=MEMORY")
+        # Negative values are in KiB, so this is a 64 MB page cache
+        db.execute("PRAGMA cache_size=-64000")
+        db.execute("PRAGMA mmap_size=268435456")
     except:
         error("Failed to open database, {}".format(the_database))
         return None
-    return DatabaseDatabase(db)
+
+    database = DatabaseDatabase(db)
+    try:
+        database.upgrade_schema()
+    except sqlite3.Error:
+        exception("Failed to upgrade database, {}".format(the_database))
+        return None
+    return database
 
 
 def db_error(f):
@@ -44,7 +74,7 @@ def db_error(f):
         try:
             f(*args, **kwargs)
             return True
-        except:  # pylint: disable=bare-except
+        except Exception:  # pylint: disable=broad-except
             exception("Database exception thrown")
             return False
 
@@ -52,68 +82,270 @@ def db_error(f):
 
 
 def db_error_default(default_value):
-    """Handle database errors and log them."""
-
-    value = default_value
+    """
+    Handle database errors and log them. A callable default_value, like list, is
+    called to make a fresh default every time so callers can't share (and mutate) one.
+    """
 
     def decorate(f):
         @wraps(f)
         def protected(*args, **kwargs):
-            nonlocal value
             try:
                 return f(*args, **kwargs)
-            except:  # pylint: disable=bare-except
+            except Exception:  # pylint: disable=broad-except
                 exception("Database exception thrown")
-                return value
+                if callable(default_value):
+                    return default_value()
+                return default_value
 
         return protected
 
     return decorate
 
 
-def _collate_alphanum(str1, str2):
-    """Collation definition used by the sqlite database."""
-
-    str1 = _alphanum_convert(str1)
-    str2 = _alphanum_convert(str2)
-
-    if str1 == str2:
-        return 0
-    elif str1 < str2:
-        return -1
-    else:
-        return 1
-
-
 _alphanum_regex = re.compile("[^a-zA-Z0-9]+")
-_romanization_o = re.compile("\bwo\b")
+_romanization_o = re.compile(r"\bwo\b")
+_whitespace_regex = re.compile(r"\s+")
+
+# Column order matches the arguments of the Show constructor
+_SHOW_COLUMNS = (
+    "id, id_mal, name, name_en, type, has_source, is_nsfw, megathread, enabled"
+)
+_SELECT_SHOWS = "SELECT {} FROM Shows".format(_SHOW_COLUMNS)
+_SELECT_SHOW_BY_ID = _SELECT_SHOWS + " WHERE id = ?"
+_SELECT_SHOW_BY_NAME = _SELECT_SHOWS + " WHERE name_norm = ?"
 
 
+@lru_cache(maxsize=4096)
 def _alphanum_convert(s):
     """Handle some romanization quirks."""
 
+    # Precomposed and decomposed accents have to give the same result
+    if not s.isascii():
+        s = normalize("NFC", s)
     # Characters to words
     s = s.replace("&", "and")
     # Japanese romanization differences
     s = _romanization_o.sub("o", s)
     s = s.replace("uu", "u")
-    s = s.replace("wo", "o")
 
-    s = _alphanum_regex.sub("", s)
-    s = s.lower()
-    return unidecode(s)
+    # Only ascii letters and digits survive, so there is nothing left to transliterate
+    return _alphanum_regex.sub("", s).lower()
+
+
+def _cutoff_time(num_days):
+    """Return the unix timestamp num_days before now."""
+
+    return int(time.time()) - num_days * 24 * 60 * 60
+
+
+def _sanitize_name(name):
+    """
+    Sanitize & to and to avoid over-zealous lemmy sanitization in post titles, then
+    collapse the whitespace that leaves behind. Also puts the name in NFC form.
+    """
+
+    name = normalize("NFC", name)
+    return _whitespace_regex.sub(" ", name.replace("&", " and "))
+
+
+def _normalize_show_row(raw_show: UnprocessedShow):
+    """
+    Clean up the fields of an UnprocessedShow and return them in the column order of
+    the Shows table, followed by the normalized name used for lookups.
+    """
+
+    id_mal = raw_show.id_mal
+    name = raw_show.name
+    name_en = raw_show.name_en
+
+    # None is written to db as NULL and can sometimes end up in posts, just use ""
+    if not id_mal:
+        id_mal = ""
+
+    if not name_en:
+        name_en = ""
+
+    # Sanitize before comparing so composed and decomposed forms of a name match
+    name = _sanitize_name(name)
+    if name_en:
+        name_en = _sanitize_name(name_en)
+
+    # Exact matches, the common case, are found without building lowercase copies.
+    # Lengths can't be compared first, lower() can change them (e.g. for "İ").
+    if name_en:
+        if name_en == name or name_en.lower() == name.lower():
+            name_en = ""
+
+    return (
+        raw_show.media_id,
+        id_mal,
+        name,
+        name_en,
+        raw_show.show_type,
+        raw_show.has_source,
+        raw_show.is_nsfw,
+        raw_show.is_airing,
+        _alphanum_convert(name),
+    )
+
+
+# Bump _SCHEMA_VERSION whenever _SCHEMA_SQL changes so upgrade_schema applies it to
+# existing databases when they are opened
+_SCHEMA_VERSION = 3
+
+# name and name_en are stored in NFC form, name_norm is _alphanum_convert(name)
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS ShowTypes (
+    id		INTEGER NOT NULL PRIMARY KEY UNIQUE,
+    key		TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS Shows (
+    id		    INTEGER NOT NULL PRIMARY KEY UNIQUE,
+    id_mal      INTEGER,
+    name		TEXT NOT NULL,
+    name_en		TEXT,
+    type		INTEGER NOT NULL,
+    has_source	INTEGER NOT NULL DEFAULT 0,
+    is_nsfw		INTEGER NOT NULL DEFAULT 0,
+    megathread  INTEGER NOT NULL DEFAULT 0,
+    enabled		INTEGER NOT NULL DEFAULT 1,
+    name_norm   TEXT,
+    FOREIGN KEY(type) REFERENCES ShowTypes(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_shows_name_norm ON Shows(name_norm);
+
+CREATE TABLE IF NOT EXISTS Aliases (
+    id		    INTEGER NOT NULL,
+    alias		TEXT NOT NULL,
+    FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE,
+    UNIQUE(id, alias) ON CONFLICT IGNORE
+);
+
+CREATE TABLE IF NOT EXISTS Seasons (
+    id              INTEGER NOT NULL,
+    season          TEXT NOT NULL,
+    year            INTEGER NOT NULL,
+    track           INTEGER NOT NULL DEFAULT 1,
+    has_episodes    INTEGER NOT NULL DEFAULT 0,
+    updated         INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE,
+    UNIQUE(id) ON CONFLICT REPLACE
+);
+
+-- Shows of a given season, used by the wiki module
+CREATE INDEX IF NOT EXISTS idx_seasons_season_year ON Seasons(season, year);
+
+CREATE TABLE IF NOT EXISTS Episodes (
+    id  		    INTEGER NOT NULL,
+    episode		    INTEGER NOT NULL,
+    post_url	    TEXT,
+    can_edit        INTEGER NOT NULL,
+    creation_time   INTEGER NOT NULL,
+    UNIQUE(id, episode) ON CONFLICT REPLACE,
+    FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE
+);
+
+-- Episodes keeps every episode ever posted, get_recent_episodes and
+-- build_latest_episodes filter by age. Including id lets build_latest_episodes find
+-- the recent shows from the index alone.
+CREATE INDEX IF NOT EXISTS idx_episodes_creation_id ON Episodes(creation_time, id);
+
+CREATE TABLE IF NOT EXISTS UserEpisodes (
+    id              INTEGER NOT NULL,
+    episode         INTEGER NOT NULL,
+    post_url        text,
+    can_edit        INTEGER NOT NULL,
+    creation_time   INTEGER NOT NULL,
+    UNIQUE(id, episode) ON CONFLICT REPLACE,
+    FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS UpcomingEpisodes (
+    id              INTEGER NOT NULL,
+    episode         INTEGER NOT NULL,
+    airing_time     INTEGER NOT NULL,
+    UNIQUE(id, episode) ON CONFLICT REPLACE,
+    FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE
+);
+
+-- Covers get_aired_episodes, so it never has to read the table itself
+CREATE INDEX IF NOT EXISTS idx_upcoming_airing
+    ON UpcomingEpisodes(airing_time, id, episode);
+
+CREATE TABLE IF NOT EXISTS IgnoredEpisodes (
+    id              INTEGER NOT NULL,
+    episode         INTEGER NOT NULL,
+    airing_time     INTEGER NOT NULL,
+    UNIQUE(id, episode) ON CONFLICT REPLACE,
+    FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS LatestEpisodes (
+    id              INTEGER NOT NULL,
+    episode         INTEGER NOT NULL,
+    post_url        TEXT,
+    can_edit        INTEGER NOT NULL,
+    creation_time   INTEGER NOT NULL,
+    UNIQUE(id) ON CONFLICT REPLACE,
+    FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS SummaryPosts (
+    number          INTEGER NOT NULL,
+    post_url        TEXT,
+    pinned          INTEGER NOT NULL,
+    creation_time   INTEGER NOT NULL,
+    last_update     INTEGER NOT NULL,
+    UNIQUE(number) ON CONFLICT REPLACE
+);
+
+CREATE TABLE IF NOT EXISTS Megathreads (
+    id              INTEGER NOT NULL,
+    thread_num      INTEGER NOT NULL,
+    post_url        TEXT,
+    num_episodes    INTEGER NOT NULL,
+    UNIQUE(id, thread_num) ON CONFLICT REPLACE,
+    FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS Links (
+    id              INTEGER NOT NULL,
+    link_type       TEXT,
+    site            TEXT,
+    language        TEXT,
+    url             TEXT,
+    UNIQUE(id, site, language) ON CONFLICT REPLACE,
+    FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_links_id_type ON Links(id, link_type);
+
+CREATE TABLE IF NOT EXISTS Images (
+    id              INTEGER NOT NULL,
+    image_type      TEXT,
+    image_link      TEXT,
+    UNIQUE(id, image_type) ON CONFLICT REPLACE,
+    FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE
+);
+"""
 
 
 class DatabaseDatabase:
-    """Class to manage database interactions for rikka."""
+    """
+    Class to manage database interactions for rikka. Prepared statements are cached
+    on the connection, so keep one instance open for the whole run instead of
+    reopening the database.
+    """
 
     def __init__(self, db):
         self._db = db
+        # Every query goes through this one cursor, so keep each instance on the
+        # thread that opened it (sqlite3's default check_same_thread enforces this)
         self.q = db.cursor()
 
-        # Set up collations
-        self._db.create_collation("alphanum", _collate_alphanum)
-
     def save(self):
         """Commit changes to the db."""
 
@@ -124,169 +356,148 @@ class DatabaseDatabase:
 
         self._db.rollback()
 
-    def setup_tables(self):
-        """Creates the tables and schema used by rikka."""
+    @contextmanager
+    def transaction(self):
+        """
+        Group the statements run inside the with block into a single commit. Rolls back
+        and re-raises if any of them fail. Methods called inside the block should be
+        passed commit=False so they don't commit part of the work early. Work left
+        pending by an earlier commit=False call is committed before the block starts,
+        so a rollback can't take it along.
+
+        Raises sqlite3.OperationalError if the database stays locked by another process
+        for longer than the connection's timeout.
+        """
 
-        self.q.execute(
-            """CREATE TABLE IF NOT EXISTS ShowTypes (
-            id		INTEGER NOT NULL PRIMARY KEY UNIQUE,
-            key		TEXT NOT NULL
-        )"""
-        )
-        self.q.executemany(
-            "INSERT OR IGNORE INTO ShowTypes (id, key) VALUES (?, ?)",
-            [(t.value, t.name.lower()) for t in ShowType],
-        )
+        if self._db.in_transaction:
+            debug("Committing pending changes before starting a transaction")
+            self._db.commit()
 
-        self.q.execute(
-            """CREATE TABLE IF NOT EXISTS Shows (
-            id		    INTEGER NOT NULL PRIMARY KEY UNIQUE,
-            id_mal      INTEGER,
-            name		TEXT NOT NULL,
-            name_en		TEXT,
-            type		INTEGER NOT NULL,
-            has_source	INTEGER NOT NULL DEFAULT 0,
-            is_nsfw		INTEGER NOT NULL DEFAULT 0,
-            megathread  INTEGER NOT NULL DEFAULT 0,
-            enabled		INTEGER NOT NULL DEFAULT 1,
-            FOREIGN KEY(type) REFERENCES ShowTypes(id)
-        )"""
-        )
+        # Take the write lock up front. A deferred transaction that reads first can't
+        # wait for another process's lock when it later writes, it just fails.
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self
+            self._db.commit()
+        except BaseException:
+            self._db.rollback()
+            raise
 
-        self.q.execute(
-            """CREATE TABLE IF NOT EXISTS Aliases (
-            id		    INTEGER NOT NULL,
-            alias		TEXT NOT NULL,
-            FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE,
-            UNIQUE(id, alias) ON CONFLICT IGNORE
-        )"""
-        )
+    def _insert_many(self, sql, rows):
+        """
+        Run an INSERT for every row, skipping (and logging) only the rows that break a
+        constraint instead of losing the whole batch. Must be called inside a
+        transaction.
 
-        self.q.execute(
-            """CREATE TABLE IF NOT EXISTS Seasons (
-            id              INTEGER NOT NULL,
-            season          TEXT NOT NULL,
-            year            INTEGER NOT NULL,
-            track           INTEGER NOT NULL DEFAULT 1,
-            has_episodes    INTEGER NOT NULL DEFAULT 0,
-            updated         INTEGER NOT NULL DEFAULT 0,
-            FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE,
-            UNIQUE(id) ON CONFLICT REPLACE
-        )"""
-        )
+            Parameters:
+                sql             The INSERT statement, with a placeholder per column
+                rows            List of parameter tuples, one per row
 
-        self.q.execute(
-            """CREATE TABLE IF NOT EXISTS Episodes (
-            id  		    INTEGER NOT NULL,
-            episode		    INTEGER NOT NULL,
-            post_url	    TEXT,
-            can_edit        INTEGER NOT NULL,
-            creation_time   INTEGER NOT NULL,
-            UNIQUE(id, episode) ON CONFLICT REPLACE,
-            FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE
-        )"""
-        )
+            Returns:
+                inserted        List of the rows that were inserted
+        """
 
-        self.q.execute(
-            """CREATE TABLE IF NOT EXISTS UserEpisodes (
-            id              INTEGER NOT NULL,
-            episode         INTEGER NOT NULL,
-            post_url        text,
-            can_edit        INTEGER NOT NULL,
-            creation_time   INTEGER NOT NULL,
-            UNIQUE(id, episode) ON CONFLICT REPLACE,
-            FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE
-        )"""
-        )
+        self.q.execute("SAVEPOINT insert_many")
+        try:
+            self.q.executemany(sql, rows)
+            self.q.execute("RELEASE insert_many")
+            return rows
+        except sqlite3.IntegrityError:
+            # Undo the rows executemany got through, then find the bad ones one by one
+            self.q.execute("ROLLBACK TO insert_many")
+            self.q.execute("RELEASE insert_many")
+
+        inserted = []
+        for row in rows:
+            try:
+                self.q.execute(sql, row)
+                inserted.append(row)
+            except sqlite3.IntegrityError as e:
+                error("Skipping row {}: {}".format(row, e))
+        return inserted
 
-        self.q.execute(
-            """CREATE TABLE IF NOT EXISTS UpcomingEpisodes (
-            id              INTEGER NOT NULL,
-            episode         INTEGER NOT NULL,
-            airing_time     INTEGER NOT NULL,
-            UNIQUE(id, episode) ON CONFLICT REPLACE,
-            FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE
-        )"""
-        )
+    def _add_name_norm(self):
+        """
+        Add and backfill the name_norm column of databases created before it existed.
+        Must be called inside a transaction.
+        """
 
-        self.q.execute(
-            """CREATE TABLE IF NOT EXISTS IgnoredEpisodes (
-            id              INTEGER NOT NULL,
-            episode         INTEGER NOT NULL,
-            airing_time     INTEGER NOT NULL,
-            UNIQUE(id, episode) ON CONFLICT REPLACE,
-            FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE
-        )"""
+        debug("Adding name_norm column to Shows")
+        self.q.execute("ALTER TABLE Shows ADD COLUMN name_norm TEXT")
+        self.q.execute("SELECT id, name FROM Shows")
+        self.q.executemany(
+            "UPDATE Shows SET name_norm = ? WHERE id = ?",
+            [(_alphanum_convert(name), show_id) for show_id, name in self.q.fetchall()],
         )
 
-        self.q.execute(
-            """CREATE TABLE IF NOT EXISTS LatestEpisodes (
-            id              INTEGER NOT NULL,
-            episode         INTEGER NOT NULL,
-            post_url        TEXT,
-            can_edit        INTEGER NOT NULL,
-            creation_time   INTEGER NOT NULL,
-            UNIQUE(id) ON CONFLICT REPLACE,
-            FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE
-        )"""
-        )
+    def _create_schema(self):
+        """
+        Create the tables and indexes of _SCHEMA_SQL that don't exist yet, seed
+        ShowTypes and record the schema version. Must be called inside a transaction.
+        """
 
-        self.q.execute(
-            """CREATE TABLE IF NOT EXISTS SummaryPosts (
-            number          INTEGER NOT NULL,
-            post_url        TEXT,
-            pinned          INTEGER NOT NULL,
-            creation_time   INTEGER NOT NULL,
-            last_update     INTEGER NOT NULL,
-            UNIQUE(number) ON CONFLICT REPLACE
-        )"""
-        )
+        # executescript would commit on its own, so run the statements one at a time.
+        # _SCHEMA_SQL has no semicolons other than the ones ending its statements.
+        for statement in _SCHEMA_SQL.split(";"):
+            if statement.strip():
+                self.q.execute(statement)
 
-        self.q.execute(
-            """CREATE TABLE IF NOT EXISTS Megathreads (
-            id              INTEGER NOT NULL,
-            thread_num      INTEGER NOT NULL,
-            post_url        TEXT,
-            num_episodes    INTEGER NOT NULL,
-            UNIQUE(id, thread_num) ON CONFLICT REPLACE,
-            FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE
-        )"""
+        self.q.executemany(
+            "INSERT OR IGNORE INTO ShowTypes (id, key) VALUES (?, ?)",
+            [(t.value, t.name.lower()) for t in ShowType],
         )
+        self.q.execute("PRAGMA user_version = {}".format(_SCHEMA_VERSION))
 
-        self.q.execute(
-            """CREATE TABLE IF NOT EXISTS Links (
-            id              INTEGER NOT NULL,
-            link_type       TEXT,
-            site            TEXT,
-            language        TEXT,
-            url             TEXT,
-            UNIQUE(id, site, language) ON CONFLICT REPLACE,
-            FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE
-        )"""
-        )
+    def upgrade_schema(self):
+        """
+        Bring a database created by an older version of rikka up to the current schema
+        in one transaction. Does nothing for a database that is already up to date, or
+        for a new one that setup_tables hasn't created the tables in yet.
 
-        self.q.execute(
-            """CREATE TABLE IF NOT EXISTS Images (
-            id              INTEGER NOT NULL,
-            image_type      TEXT,
-            image_link      TEXT,
-            UNIQUE(id, image_type) ON CONFLICT REPLACE,
-            FOREIGN KEY(id) REFERENCES Shows(id) ON DELETE CASCADE
-        )"""
-        )
+        Raises sqlite3.Error if the upgrade fails, none of it is applied in that case.
+        """
 
-        self._db.commit()
+        self.q.execute("PRAGMA user_version")
+        if self.q.fetchone()[0] >= _SCHEMA_VERSION:
+            return
+
+        self.q.execute("PRAGMA table_info(Shows)")
+        columns = [column[1] for column in self.q]
+        if not columns:
+            return
+
+        debug("Upgrading database schema to version {}".format(_SCHEMA_VERSION))
+        with self.transaction():
+            if "name_norm" not in columns:
+                self._add_name_norm()
+            # Replaced by idx_episodes_creation_id
+            self.q.execute("DROP INDEX IF EXISTS idx_episodes_creation")
+            self._create_schema()
+
+    def setup_tables(self):
+        """
+        Creates the tables and schema used by rikka in one transaction. Skipped if the
+        database is already at the current schema version.
+        """
+
+        self.q.execute("PRAGMA user_version")
+        if self.q.fetchone()[0] >= _SCHEMA_VERSION:
+            debug("Database schema is already up to date")
+            return
+
+        with self.transaction():
+            self._create_schema()
 
     # Shows
 
-    @db_error_default(list())
+    @db_error_default(list)
     def get_aliases(self, show: Show) -> List[str]:
         """Return list of aliases for a given Show object."""
 
         self.q.execute("SELECT alias FROM Aliases where id = ?", (show.id,))
-        return [s for s, in self.q.fetchall()]
+        return [s for s, in self.q]
 
-    @db_error_default(list())
+    @db_error_default(list)
     def get_shows(self, enabled="enabled") -> List[Show]:
         """
         Query the database for list of Show objects.
@@ -301,14 +512,10 @@ class DatabaseDatabase:
 
         debug("Getting shows from database")
 
-        shows = list()
+        where = ""
+        params = ()
 
-        if enabled == "all":
-            self.q.execute(
-                "SELECT id, id_mal, name, name_en, type, has_source, is_nsfw, \
-                megathread, enabled FROM Shows"
-            )
-        else:
+        if enabled != "all":
             if enabled == "enabled":
                 enabled = 1
             elif enabled == "disabled":
@@ -316,17 +523,64 @@ class DatabaseDatabase:
             else:
                 error("enabled parameter not set correctly")
 
+            where = " WHERE enabled = ?"
+            params = (enabled,)
+
+        return self._get_shows_where(where, params)
+
+    def _get_shows_where(self, where, params, with_season=False):
+        """
+        Return the Show objects matching a WHERE clause on the Shows table. The
+        aliases and links of all the shows (and optionally their season and year)
+        are fetched with one query each instead of per show.
+
+            Parameters:
+                where           WHERE clause appended to the Shows SELECT, or ""
+                params          Parameters for the placeholders in where
+                with_season     Also set the season and year of each show, like
+                                get_show does
+        """
+
+        # Restricts the other queries to the same shows
+        show_ids = "(SELECT id FROM Shows" + where + ")"
+
+        self.q.execute(_SELECT_SHOWS + where, params)
+        # Build the shows before the cursor is reused for the queries below
+        shows = [Show(*row) for row in self.q]
+
+        aliases = dict()
+        self.q.execute(
+            "SELECT id, alias FROM Aliases WHERE id IN "
+            + show_ids
+            + " ORDER BY id, alias",
+            params,
+        )
+        for show_id, alias in self.q:
+            aliases.setdefault(show_id, []).append(alias)
+
+        external_links = dict()
+        self.q.execute(
+            "SELECT id, link_type, site, language, url FROM Links WHERE id IN "
+            + show_ids
+            + " ORDER BY link_type ASC",
+            params,
+        )
+        for link in self.q:
+            external_links.setdefault(link[0], []).append(ExternalLink(*link))
+
+        seasons = dict()
+        if with_season:
             self.q.execute(
-                "SELECT id, id_mal, name, name_en, type, has_source, is_nsfw, \
-                megathread, enabled FROM Shows WHERE enabled = ?",
-                (enabled,),
+                "SELECT id, season, year FROM Seasons WHERE id IN " + show_ids,
+                params,
             )
+            seasons = {show_id: (season, int(year)) for show_id, season, year in self.q}
 
-        for show in self.q.fetchall():
-            show = Show(*show)
-            show.aliases = self.get_aliases(show)
-            show.external_links = self.get_external_links(show.id)
-            shows.append(show)
+        for show in shows:
+            show.aliases = aliases.get(show.id, [])
+            show.external_links = external_links.get(show.id, [])
+            if with_season:
+                show.season, show.year = seasons.get(show.id, (None, None))
 
         return shows
 
@@ -339,11 +593,7 @@ class DatabaseDatabase:
         if id is None:
             error("Show ID not provided to get_show")
             return None
-        self.q.execute(
-            "SELECT id, id_mal, name, name_en, type, has_source, is_nsfw, megathread, \
-            enabled FROM Shows WHERE id = ?",
-            (id,),
-        )
+        self.q.execute(_SELECT_SHOW_BY_ID, (id,))
         show = self.q.fetchone()
         if show is None:
             return None
@@ -354,22 +604,27 @@ class DatabaseDatabase:
         show.year = self.get_year(show.id)
         return show
 
+    @db_error_default(set)
+    def get_show_ids(self) -> Set[int]:
+        """Return the ids of all the shows in the database."""
+
+        self.q.execute("SELECT id FROM Shows")
+        return {show_id for show_id, in self.q}
+
     @db_error_default(None)
     def get_show_by_name(self, name) -> Optional[Show]:
         """Query the database and return the Show object from given name."""
 
         debug("Getting show from database")
 
-        self.q.execute(
-            "SELECT id, name, name_en, type, has_source, is_nsfw, megathread, enabled, \
-            FROM Shows WHERE name = ?",
-            (name,),
-        )
+        # Compared on the normalized name so the lookup can use idx_shows_name_norm
+        self.q.execute(_SELECT_SHOW_BY_NAME, (_alphanum_convert(name),))
         show = self.q.fetchone()
         if show is None:
             return None
         show = Show(*show)
         show.aliases = self.get_aliases(show)
+        show.external_links = self.get_external_links(show.id)
         return show
 
     @db_error_default(None)
@@ -378,47 +633,55 @@ class DatabaseDatabase:
 
         debug("Inserting show: {}".format(raw_show))
 
-        id = raw_show.media_id  # pylint: disable=W0622
-        id_mal = raw_show.id_mal
-        name = raw_show.name
-        name_en = raw_show.name_en
-
-        # None is written to db as NULL and can sometimes end up in posts, just use ""
-        if not id_mal:
-            id_mal = ""
-
-        if not name_en:
-            name_en = ""
-
-        if name_en:
-            if name_en.lower() == name.lower():
-                name_en = ""
-
-        # Sanitize & to and to avoid over-zealous lemmy sanitization in post titles
-        name = name.replace("&", " and ")
-        name = re.sub(r"\s+", " ", name)
-        if name_en:
-            name_en = name_en.replace("&", " and ")
-            name_en = re.sub(r"\s+", " ", name_en)
-
-        show_type = raw_show.show_type
-        has_source = raw_show.has_source
-        is_nsfw = raw_show.is_nsfw
-        enabled = raw_show.is_airing
+        row = _normalize_show_row(raw_show)
         self.q.execute(
             "INSERT INTO Shows (id, id_mal, name, name_en, type, has_source, is_nsfw, \
-            enabled) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (id, id_mal, name, name_en, show_type, has_source, is_nsfw, enabled),
+            enabled, name_norm) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            row,
+        )
+
+        season = raw_show.season
+        year = raw_show.year
+        self.add_season_year(
+            media_id=raw_show.media_id, season=season, year=year, commit=False
         )
 
         if commit:
             self._db.commit()
 
-        season = raw_show.season
-        year = raw_show.year
-        self.add_season_year(media_id=id, season=season, year=year)
+        return raw_show.media_id
 
-        return id
+    @db_error
+    def add_shows_bulk(self, raw_shows: List[UnprocessedShow]):
+        """Add many shows, and their seasons, to the database in one transaction."""
+
+        if not raw_shows:
+            return
+
+        debug("Inserting {} shows".format(len(raw_shows)))
+
+        rows = []
+        seasons = dict()
+        for raw_show in raw_shows:
+            try:
+                rows.append(_normalize_show_row(raw_show))
+            except Exception:  # pylint: disable=broad-except
+                exception("Skipping show {}".format(raw_show.media_id))
+                continue
+            seasons[raw_show.media_id] = (raw_show.season, raw_show.year)
+
+        with self.transaction():
+            inserted = self._insert_many(
+                "INSERT INTO Shows (id, id_mal, name, name_en, type, has_source, "
+                "is_nsfw, enabled, name_norm) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            # Only the shows that made it in get a season
+            self._insert_many(
+                "INSERT INTO Seasons (id, season, year, track, has_episodes, updated) "
+                "VALUES (?, ?, ?, 1, 0, 0)",
+                [(row[0],) + seasons[row[0]] for row in inserted],
+            )
 
     @db_error
     def add_alias(self, show_id: int, alias: str, commit=True):
@@ -432,6 +695,18 @@ class DatabaseDatabase:
         if commit:
             self._db.commit()
 
+    @db_error
+    def add_aliases_bulk(self, aliases):
+        """Add many aliases, given as (show id, alias) pairs, in one transaction."""
+
+        if not aliases:
+            return
+
+        debug("Adding {} aliases".format(len(aliases)))
+
+        with self.transaction():
+            self._insert_many("INSERT INTO Aliases (id, alias) VALUES (?, ?)", aliases)
+
     @db_error_default(None)
     def update_show(
         self, show_id: int, raw_show: UnprocessedShow, commit=True, ignore_enabled=False
@@ -440,63 +715,54 @@ class DatabaseDatabase:
 
         debug("Updating show: {}".format(raw_show))
 
-        id_mal = raw_show.id_mal
-        name = raw_show.name
-        name_en = raw_show.name_en
-
-        # None is written to db as NULL and can sometimes end up in posts, just use ""
-        if not id_mal:
-            id_mal = ""
-
-        if not name_en:
-            name_en = ""
-
-        if name_en:
-            if name_en.lower() == name.lower():
-                name_en = ""
-
-        # Sanitize & to and to avoid over-zealous lemmy sanitization in post titles
-        name = name.replace("&", " and ")
-        name = re.sub(r"\s+", " ", name)
-        if name_en:
-            name_en = name_en.replace("&", " and ")
-            name_en = re.sub(r"\s+", " ", name_en)
-
-        show_type = raw_show.show_type
-        has_source = raw_show.has_source
-        is_nsfw = raw_show.is_nsfw
-
-        if not ignore_enabled:
-            enabled = raw_show.is_airing
-        else:
-            db_show = self.get_show(id=show_id)
-            enabled = db_show.enabled
-
-        if id_mal:
-            self.q.execute(
-                "UPDATE Shows SET id_mal = ? WHERE id = ?", (id_mal, show_id)
-            )
-        if name:
-            self.q.execute("UPDATE Shows SET name = ? WHERE id = ?", (name, show_id))
-        if name_en:
-            self.q.execute(
-                "UPDATE Shows SET name_en = ? WHERE id = ?", (name_en, show_id)
-            )
+        (
+            _,
+            id_mal,
+            name,
+            name_en,
+            show_type,
+            has_source,
+            is_nsfw,
+            enabled,
+            name_norm,
+        ) = _normalize_show_row(raw_show)
+
+        # None keeps the enabled status that is already in the database
+        if ignore_enabled:
+            enabled = None
+
+        # Empty values keep the existing column value
         self.q.execute(
-            "UPDATE Shows SET type = ?, has_source = ?, is_nsfw = ?, enabled = ? WHERE id = ?",
-            (show_type, has_source, is_nsfw, enabled, show_id),
+            "UPDATE Shows SET id_mal = COALESCE(NULLIF(?, ''), id_mal), "
+            "name = COALESCE(NULLIF(?, ''), name), "
+            "name_norm = COALESCE(?, name_norm), "
+            "name_en = COALESCE(NULLIF(?, ''), name_en), "
+            "type = ?, has_source = ?, is_nsfw = ?, enabled = COALESCE(?, enabled) "
+            "WHERE id = ?",
+            (
+                id_mal,
+                name,
+                name_norm if name else None,
+                name_en,
+                show_type,
+                has_source,
+                is_nsfw,
+                enabled,
+                show_id,
+            ),
         )
 
-        if commit:
-            self._db.commit()
-
         self.add_season_year(
             media_id=show_id,
             season=raw_show.season,
             year=raw_show.year,
             ignore_tracking=True,
+            commit=False,
         )
-        self.update_single_has_episodes(media_id=show_id)
+        self.update_single_has_episodes(media_id=show_id, commit=False)
+
+        if commit:
+            self._db.commit()
 
     @db_error
     def set_show_enabled(self, show: Show, enabled=True, commit=True):
@@ -513,6 +779,24 @@ class DatabaseDatabase:
         if commit:
             self._db.commit()
 
+    @db_error
+    def set_shows_enabled(self, show_ids: List[int], enabled=True, commit=True):
+        """Set many shows, given by id, as enabled or disabled."""
+
+        debug(
+            "Marking {} shows as {}".format(
+                len(show_ids), "enabled" if enabled else "disabled"
+            )
+        )
+
+        self.q.executemany(
+            "UPDATE Shows SET enabled = ? WHERE id = ?",
+            [(enabled, show_id) for show_id in show_ids],
+        )
+
+        if commit:
+            self._db.commit()
+
     @db_error
     def remove_show(self, show_id: int, commit=True):
         """Remove a show from the database entirely."""
@@ -524,18 +808,18 @@ class DatabaseDatabase:
         if commit:
             self._db.commit()
 
-    @db_error_default(bool)
+    @db_error_default(False)
     def get_megathread_status(self, show_id):
         """
         Returns a boolean. True if a show is currently set to post in a
         megathread, False if episodes get individual discussion posts.
         """
 
-        self.q.execute("SELECT megathread FROM Shows WHERE id = ?", (show_id,))
-
-        megathread = self.q.fetchone()
+        self.q.execute(
+            "SELECT 1 FROM Shows WHERE id = ? AND megathread = 1", (show_id,)
+        )
 
-        return bool(megathread)
+        return self.q.fetchone() is not None
 
     @db_error_default(list)
     def get_megathread_statuses(self, enabled="enabled"):
@@ -548,8 +832,6 @@ class DatabaseDatabase:
 
         debug("Getting list of shows using megathreads from the database.")
 
-        show_ids = list()
-
         if enabled == "all":
             self.q.execute("SELECT id FROM Shows WHERE megathread = ?", (1,))
         else:
@@ -565,10 +847,7 @@ class DatabaseDatabase:
                 (1, enabled),
             )
 
-        for show in self.q.fetchall():
-            show_ids.append(show)
-
-        return show_ids
+        return [row[0] for row in self.q]
 
     @db_error
     def set_megathread_status(self, show_id, enabled, commit=True):
@@ -593,6 +872,7 @@ class DatabaseDatabase:
         has_episodes=False,
         updated=False,
         ignore_tracking=False,
+        commit=True,
     ):
         """Add the season and year to the Seasons table"""
 
@@ -613,9 +893,10 @@ class DatabaseDatabase:
                 (media_id, season, year, track_status, int(has_episodes), int(updated)),
             )
 
-        self._db.commit()
+        if commit:
+            self._db.commit()
 
-    @db_error_default(int)
+    @db_error_default(None)
     def get_track_status(self, media_id):
         """Get the status of a shows track value in the Seasons table if it exists."""
 
@@ -627,7 +908,7 @@ class DatabaseDatabase:
         else:
             return None
 
-    @db_error_default(int)
+    @db_error_default(None)
     def get_year(self, media_id):
         """Get the year for a given id."""
 
@@ -640,7 +921,7 @@ class DatabaseDatabase:
         else:
             return None
 
-    @db_error_default(str)
+    @db_error_default(None)
     def get_season(self, media_id):
         """Get the season for a given media id."""
 
@@ -654,23 +935,27 @@ class DatabaseDatabase:
             return None
 
     @db_error
-    def set_updated(self, media_id, updated=True):
+    def set_updated(self, media_id, updated=True, commit=True):
         """Mark a show in the Seasons table as having had the episode list updated."""
 
         self.q.execute(
             "UPDATE Seasons SET updated = ? WHERE id = ?", (int(updated), media_id)
         )
-        self._db.commit()
+
+        if commit:
+            self._db.commit()
 
     @db_error
-    def set_has_episodes(self, media_id, has_episodes=True):
+    def set_has_episodes(self, media_id, has_episodes=True, commit=True):
         """Mark a show as having episodes"""
 
         self.q.execute(
             "UPDATE Seasons SET has_episodes = ? WHERE id = ?",
             (int(has_episodes), media_id),
         )
-        self._db.commit()
+
+        if commit:
+            self._db.commit()
 
     @db_error
     def set_tracking(self, media_id, track=True):
@@ -681,21 +966,15 @@ class DatabaseDatabase:
         )
         self._db.commit()
 
-    @db_error_default(list())
+    @db_error_default(list)
     def get_updated_shows(self):
         """Fetch list of show ids that are marked as updated in the Seasons table."""
 
-        id_list = []
-
         self.q.execute("SELECT id FROM Seasons WHERE updated = ?", (1,))
 
-        data = self.q.fetchall()
-        for show in data:
-            id_list.append(show[0])
-
-        return id_list
+        return [show[0] for show in self.q]
 
-    @db_error_default(dict())
+    @db_error_default(dict)
     def get_season_struct(self):
         """Returns the contents of the Seasons table in a nested dict format."""
 
@@ -703,59 +982,40 @@ class DatabaseDatabase:
 
         self.q.execute("SELECT id, season, year FROM Seasons WHERE track = ?", (1,))
 
-        data = self.q.fetchall()
-        for show in data:
-            if show[2] not in result:
-                result[show[2]] = {show[1]: [show[0]]}
-            else:
-                if show[1] not in result[show[2]]:
-                    result[show[2]][show[1]] = [show[0]]
-                else:
-                    result[show[2]][show[1]].append(show[0])
+        for media_id, season, year in self.q:
+            result.setdefault(year, {}).setdefault(season, []).append(media_id)
 
         return result
 
-    @db_error_default(list())
+    @db_error_default(list)
     def get_seasons_with_episodes(self, track=True, has_episodes=True):
         """
         Returns list of all seasons that are tracked and have episodes from Seasons
         table.
         """
 
-        result = []
-
         self.q.execute(
             "SELECT DISTINCT season, year FROM Seasons WHERE track = ? AND "
             "has_episodes = ?",
             (int(track), int(has_episodes)),
         )
 
-        data = self.q.fetchall()
-        for row in data:
-            result.append([row[0], row[1]])
-
-        return result
+        return [list(row) for row in self.q]
 
-    @db_error_default(list())
+    @db_error_default(list)
     def get_shows_from_season(self, season, year, track=True, has_episodes=True):
         """
         Returns list of show ids from a specified season that are tracked and have
         episodes.
         """
 
-        result = []
-
         self.q.execute(
             "SELECT id FROM Seasons WHERE season = ? AND year = ? AND track = ? "
             "AND has_episodes = ?",
             (season, year, int(track), int(has_episodes)),
         )
 
-        data = self.q.fetchall()
-        for row in data:
-            result.append(row[0])
-
-        return result
+        return [row[0] for row in self.q]
 
     @db_error
     def set_track_season(self, season, year, track):
@@ -790,36 +1050,25 @@ class DatabaseDatabase:
         the Episodes table corresponding to it.
         """
 
-        id_list = []
-
-        self.q.execute("SELECT id FROM Seasons")
-
-        data = self.q.fetchall()
-        for row in data:
-            id_list.append(row[0])
-
-        for show in id_list:
-            self.q.execute("SELECT episode FROM Episodes WHERE id = ?", (show,))
-            data = self.q.fetchone()
-            if data is not None:
-                self.set_has_episodes(media_id=show, has_episodes=True)
-            else:
-                self.set_has_episodes(media_id=show, has_episodes=False)
+        self.q.execute(
+            "UPDATE Seasons SET has_episodes = "
+            "EXISTS (SELECT 1 FROM Episodes WHERE Episodes.id = Seasons.id)"
+        )
+        self._db.commit()
 
     @db_error
-    def update_single_has_episodes(self, media_id):
+    def update_single_has_episodes(self, media_id, commit=True):
         """
         Updates a single show in the Seasons table to mark if there are episodes in the
         Episodes table corresponding to it.
         """
 
-        self.q.execute("SELECT episode FROM Episodes WHERE id = ?", (media_id,))
+        self.q.execute("SELECT 1 FROM Episodes WHERE id = ? LIMIT 1", (media_id,))
 
         data = self.q.fetchone()
-        if data is not None:
-            self.set_has_episodes(media_id=media_id, has_episodes=True)
-        else:
-            self.set_has_episodes(media_id=media_id, has_episodes=False)
+        self.set_has_episodes(
+            media_id=media_id, has_episodes=data is not None, commit=commit
+        )
 
     # Episodes
 
@@ -838,11 +1087,9 @@ class DatabaseDatabase:
                 creation_time       The unix timestamp that the post was created
         """
 
-        show = self.get_show(media_id)
-
         debug(
             "Inserting episode {} for show {}, link: {}".format(
-                episode_num, show.id, post_url
+                episode_num, media_id, post_url
             )
         )
 
@@ -852,12 +1099,12 @@ class DatabaseDatabase:
         self.q.execute(
             "INSERT INTO Episodes (id, episode, post_url, can_edit, creation_time) "
             "VALUES (?, ?, ?, ?, ?)",
-            (show.id, episode_num, post_url, int(can_edit), creation_time),
+            (media_id, episode_num, post_url, int(can_edit), creation_time),
         )
-        self._db.commit()
+        self.set_has_episodes(media_id=media_id, has_episodes=True, commit=False)
+        self.set_updated(media_id=media_id, updated=True, commit=False)
 
-        self.set_has_episodes(media_id=media_id, has_episodes=True)
-        self.set_updated(media_id=media_id, updated=True)
+        self._db.commit()
 
     @db_error_default(None)
     def get_latest_episode(self, show: Show) -> Optional[Episode]:
@@ -875,7 +1122,7 @@ class DatabaseDatabase:
             return Episode(show.id, *data)
         return None
 
-    @db_error_default(Episode)
+    @db_error_default(None)
     def get_episode(self, show: Show, episode: int) -> Optional[Episode]:
         """Get a specific episode for the given show and episode number"""
 
@@ -892,32 +1139,25 @@ class DatabaseDatabase:
             return Episode(show.id, *data)
         return None
 
-    @db_error_default(list())
-    def get_episodes(self, show, ensure_sorted=True) -> List[Episode]:
+    @db_error_default(list)
+    def get_episodes(self, show) -> List[Episode]:
         """Get a list of episodes for a given Show object."""
 
         debug("Fetching episodes for {}".format(show.name))
 
-        episodes = list()
+        # Sorting is free, the UNIQUE(id, episode) index is already in episode order
         self.q.execute(
             "SELECT episode, post_url, can_edit, creation_time FROM Episodes WHERE "
-            "id = ?",
+            "id = ? ORDER BY episode ASC",
             (show.id,),
         )
-        for data in self.q.fetchall():
-            episodes.append(Episode(show.id, *data))
-
-        if ensure_sorted:
-            episodes = sorted(episodes, key=lambda e: e.number)
-        return episodes
+        return [Episode(show.id, *data) for data in self.q]
 
-    @db_error_default(list())
+    @db_error_default(list)
     def get_recent_episodes(self, num_days=8):
         """Return all Episodes within the past num_days"""
 
-        current_time = int(time.time())
-        cutoff_time = current_time - (num_days * 24 * 60 * 60)
-        episodes = list()
+        cutoff_time = _cutoff_time(num_days)
 
         self.q.execute(
             "SELECT id, episode, post_url, can_edit, creation_time FROM Episodes WHERE "
@@ -925,10 +1165,7 @@ class DatabaseDatabase:
             (cutoff_time,),
         )
 
-        for data in self.q.fetchall():
-            episodes.append(Episode(*data))
-
-        return episodes
+        return [Episode(*data) for data in self.q]
 
     @db_error
     def add_user_episode(
@@ -936,11 +1173,9 @@ class DatabaseDatabase:
     ):
         """Adds a user created episode to the UserEpisodes table"""
 
-        show = self.get_show(media_id)
-
         debug(
             "Inserting user episode {} for show {}, link: {}".format(
-                episode_num, show.id, post_url
+                episode_num, media_id, post_url
             )
         )
 
@@ -950,11 +1185,11 @@ class DatabaseDatabase:
         self.q.execute(
             "INSERT INTO UserEpisodes (id, episode, post_url, can_edit, creation_time) "
             "VALUES (?, ?, ?, ?, ?)",
-            (show.id, episode_num, post_url, int(can_edit), creation_time),
+            (media_id, episode_num, post_url, int(can_edit), creation_time),
         )
         self._db.commit()
 
-    @db_error_default(Episode)
+    @db_error_default(None)
     def get_user_episode(self, show: Show, episode: int) -> Optional[Episode]:
         """Get a specific episode for the given show and episode number"""
 
@@ -971,24 +1206,19 @@ class DatabaseDatabase:
             return Episode(show.id, *data)
         return None
 
-    @db_error_default(list())
-    def get_user_episodes(self, show, ensure_sorted=True) -> List[Episode]:
+    @db_error_default(list)
+    def get_user_episodes(self, show) -> List[Episode]:
         """Get a list of episodes for a given Show object."""
 
         debug("Fetching user episodes for {}".format(show.name))
 
-        episodes = list()
+        # Sorting is free, the UNIQUE(id, episode) index is already in episode order
         self.q.execute(
             "SELECT episode, post_url, can_edit, creation_time FROM UserEpisodes WHERE "
-            "id = ?",
+            "id = ? ORDER BY episode ASC",
             (show.id,),
         )
-        for data in self.q.fetchall():
-            episodes.append(Episode(show.id, *data))
-
-        if ensure_sorted:
-            episodes = sorted(episodes, key=lambda e: e.number)
-        return episodes
+        return [Episode(show.id, *data) for data in self.q]
 
     @db_error
     def add_upcoming_episode(self, upcoming_episode):
@@ -1007,29 +1237,41 @@ class DatabaseDatabase:
 
         self._db.commit()
 
-    @db_error_default(list())
+    @db_error
+    def add_upcoming_episodes_bulk(self, upcoming_episodes):
+        """Add many UpcomingEpisode objects to the database in one transaction."""
+
+        if not upcoming_episodes:
+            return
+
+        debug("Adding {} upcoming episodes".format(len(upcoming_episodes)))
+
+        with self.transaction():
+            self._insert_many(
+                "INSERT INTO UpcomingEpisodes (id, episode, airing_time) "
+                "VALUES (?, ?, ?)",
+                [
+                    (episode.media_id, episode.number, episode.airing_time)
+                    for episode in upcoming_episodes
+                ],
+            )
+
+    @db_error_default(list)
     def get_aired_episodes(self, current_time):
         """
         Get a list of UpcomingEpisodes that have a timestamp previous to provided
         current_time.
         """
 
-        upcoming = []
-
         self.q.execute(
             "SELECT id, episode, airing_time FROM UpcomingEpisodes "
             "WHERE airing_time < ? ORDER BY airing_time ASC",
             (current_time,),
         )
 
-        for data in self.q.fetchall():
-            upcoming.append(
-                UpcomingEpisode(media_id=data[0], number=data[1], airing_time=data[2])
-            )
-
-        return upcoming
+        return [UpcomingEpisode(*data) for data in self.q]
 
-    @db_error_default(UpcomingEpisode)
+    @db_error_default(None)
     def get_next_episode(self, media_id):
         """
         Return the next UpcomingEpisode object in time for the given show id.
@@ -1047,24 +1289,15 @@ class DatabaseDatabase:
         else:
             return None
 
-    @db_error_default(list())
+    @db_error_default(list)
     def get_upcoming_shows(self) -> Optional[List[Show]]:
 
-        show_ids = []
-        shows = []
-
-        self.q.execute("SELECT DISTINCT id FROM UpcomingEpisodes")
-
-        for row in self.q.fetchall():
-            show_ids.append(row[0])
-
-        for media_id in show_ids:
-            shows.append(self.get_show(media_id))
-
-        return shows
+        return self._get_shows_where(
+            " WHERE id IN (SELECT id FROM UpcomingEpisodes)", (), with_season=True
+        )
 
     @db_error
-    def remove_upcoming_episode(self, media_id, episode_num):
+    def remove_upcoming_episode(self, media_id, episode_num, commit=True):
         """Remove an upcoming episode from the UpcomingEpisodes table."""
 
         self.q.execute(
@@ -1072,7 +1305,8 @@ class DatabaseDatabase:
             (media_id, episode_num),
         )
 
-        self._db.commit()
+        if commit:
+            self._db.commit()
 
     @db_error
     def remove_upcoming_episodes(self, media_id):
@@ -1083,7 +1317,7 @@ class DatabaseDatabase:
         self._db.commit()
 
     @db_error
-    def add_ignored_episode(self, upcoming_episode: UpcomingEpisode):
+    def add_ignored_episode(self, upcoming_episode: UpcomingEpisode, commit=True):
         """Add an ignored episode to the table."""
 
         media_id = upcoming_episode.media_id
@@ -1095,9 +1329,10 @@ class DatabaseDatabase:
             (media_id, episode_num, airing_time),
         )
 
-        self._db.commit()
+        if commit:
+            self._db.commit()
 
-    @db_error_default(UpcomingEpisode)
+    @db_error_default(None)
     def get_ignored_episode(
         self, media_id: int, episode: int
     ) -> Optional[UpcomingEpisode]:
@@ -1114,7 +1349,7 @@ class DatabaseDatabase:
             return UpcomingEpisode(media_id, episode, data[2])
         return None
 
-    @db_error_default(UpcomingEpisode)
+    @db_error_default(None)
     def get_most_recent_ignored(self, media_id: int) -> Optional[UpcomingEpisode]:
         """Get the most recently aired but ignored episode for a given show."""
 
@@ -1130,21 +1365,12 @@ class DatabaseDatabase:
         else:
             return None
 
-    @db_error_default(list())
+    @db_error_default(list)
     def get_ignored_shows(self) -> Optional[List[Show]]:
 
-        show_ids = []
-        shows = []
-
-        self.q.execute("SELECT DISTINCT id FROM IgnoredEpisodes")
-
-        for row in self.q.fetchall():
-            show_ids.append(row[0])
-
-        for media_id in show_ids:
-            shows.append(self.get_show(media_id))
-
-        return shows
+        return self._get_shows_where(
+            " WHERE id IN (SELECT id FROM IgnoredEpisodes)", (), with_season=True
+        )
 
     @db_error
     def remove_ignored_episode(self, media_id: int, episode: int):
@@ -1161,8 +1387,7 @@ class DatabaseDatabase:
     def remove_old_ignored_episodes(self, num_days=30):
         """Remove all ignored episodes after they have been ignored for a given time"""
 
-        current_time = int(time.time())
-        cutoff = current_time - (num_days * 24 * 60 * 60)
+        cutoff = _cutoff_time(num_days)
 
         self.q.execute("DELETE FROM IgnoredEpisodes WHERE airing_time < ?", (cutoff,))
 
@@ -1175,14 +1400,18 @@ class DatabaseDatabase:
         within the past num_days
         """
 
-        # First, get all episodes created more recently than num_days ago
-        recent_episodes = self.get_recent_episodes(num_days=num_days)
+        cutoff_time = _cutoff_time(num_days)
 
-        # Next, iterate through, getting the latest episode for each show
-        for recent_episode in recent_episodes:
-            show = self.get_show(recent_episode.media_id)
-            most_recent = self.get_latest_episode(show=show)
-            self.add_latest_episode(most_recent)
+        # For every show with an episode created since the cutoff, copy its highest
+        # numbered episode across. Only the id is needed, so no Show is built.
+        self.q.execute(
+            "INSERT INTO LatestEpisodes (id, episode, post_url, can_edit, creation_time) "
+            "SELECT id, episode, post_url, can_edit, creation_time FROM Episodes AS e "
+            "WHERE id IN (SELECT id FROM Episodes WHERE creation_time > ?) "
+            "AND episode = (SELECT MAX(episode) FROM Episodes WHERE id = e.id)",
+            (cutoff_time,),
+        )
+        self._db.commit()
 
     @db_error
     def prune_latest_episodes(self, num_days=8):
@@ -1190,8 +1419,7 @@ class DatabaseDatabase:
         Prunes LatestEpisodes table of items created more than num_days in the past.
         """
 
-        current_time = int(time.time())
-        cutoff = current_time - (num_days * 24 * 60 * 60)
+        cutoff = _cutoff_time(num_days)
 
         self.q.execute("DELETE FROM LatestEpisodes WHERE creation_time < ?", (cutoff,))
 
@@ -1218,14 +1446,18 @@ class DatabaseDatabase:
     def get_latest_episodes(self):
         """Returns a list of all the Episode objects in LatestEpisodes table"""
 
-        latest_episodes = []
+        self.q.execute(
+            "SELECT id, episode, post_url, can_edit, creation_time FROM LatestEpisodes "
+            "ORDER BY creation_time DESC"
+        )
 
-        self.q.execute("SELECT * FROM LatestEpisodes ORDER BY creation_time DESC")
+        return [Episode(*row) for row in self.q]
 
-        for row in self.q.fetchall():
-            latest_episodes.append(Episode(*row))
+    @db_error_default(list)
+    def get_latest_episode_shows(self) -> List[Show]:
+        """Returns the Show objects of all the episodes in the LatestEpisodes table"""
 
-        return latest_episodes
+        return self._get_shows_where(" WHERE id IN (SELECT id FROM LatestEpisodes)", ())
 
     @db_error
     def add_summary_post(self, summary_post: SummaryPost):
@@ -1244,7 +1476,7 @@ class DatabaseDatabase:
         )
         self._db.commit()
 
-    @db_error_default(SummaryPost)
+    @db_error_default(None)
     def get_summary_post(self, number):
         """Fetches a specific SummaryPost"""
 
@@ -1260,7 +1492,7 @@ class DatabaseDatabase:
         else:
             return None
 
-    @db_error_default(SummaryPost)
+    @db_error_default(None)
     def get_latest_summary_post(self):
         """Fetches the most recent summary post"""
 
@@ -1279,17 +1511,12 @@ class DatabaseDatabase:
     def get_pinned_summary_posts(self):
         """Fetches any summary posts that are marked as pinned"""
 
-        summary_posts = []
-
         self.q.execute(
             "SELECT number, post_url, pinned, creation_time, last_update FROM "
             "SummaryPosts WHERE pinned = 1"
         )
 
-        for post in self.q.fetchall():
-            summary_posts.append(SummaryPost(*post))
-
-        return summary_posts
+        return [SummaryPost(*post) for post in self.q]
 
     # Megathreads
 
@@ -1297,19 +1524,13 @@ class DatabaseDatabase:
     def get_megathreads(self, media_id):
         """Returns all the megathreads for a given media id."""
 
-        megathreads = []
-
         self.q.execute(
             "SELECT id, thread_num, post_url, num_episodes FROM Megathreads \
             WHERE id = ? ORDER BY thread_num DESC",
             (media_id,),
         )
 
-        for thread in self.q.fetchall():
-            thread = Megathread(*thread)
-            megathreads.append(thread)
-
-        return megathreads
+        return [Megathread(*thread) for thread in self.q]
 
     @db_error_default(None)
     def get_latest_megathread(self, media_id):
@@ -1347,18 +1568,18 @@ class DatabaseDatabase:
             self._db.commit()
 
     @db_error
-    def increment_num_episodes(self, megathread: Megathread, commit=True):
-        """Increases num_episodes by 1 for given megathread."""
-
-        id = megathread.media_id
-        thread_num = megathread.thread_num
-        new_num_episodes = megathread.num_episodes + 1
+    def increment_num_episodes(self, media_id, thread_num, commit=True):
+        """Increases num_episodes by 1 for the given megathread of a show."""
 
         self.q.execute(
-            "UPDATE Megathreads SET num_episodes = ? WHERE id = ? AND thread_num = ?",
-            (new_num_episodes, id, thread_num),
+            "UPDATE Megathreads SET num_episodes = num_episodes + 1 "
+            "WHERE id = ? AND thread_num = ?",
+            (media_id, thread_num),
         )
 
+        if commit:
+            self._db.commit()
+
     # External Links
 
     @db_error
@@ -1385,25 +1606,44 @@ class DatabaseDatabase:
         if commit:
             self._db.commit()
 
-    @db_error_default(List)
+    @db_error
+    def add_external_links_bulk(self, external_links: List[ExternalLink]):
+        """Add many external links in one transaction."""
+
+        if not external_links:
+            return
+
+        debug("Adding {} external links".format(len(external_links)))
+
+        with self.transaction():
+            self._insert_many(
+                "INSERT INTO Links (id, link_type, site, language, url) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        link.media_id,
+                        link.link_type,
+                        link.site,
+                        link.language or "",
+                        link.url,
+                    )
+                    for link in external_links
+                ],
+            )
+
+    @db_error_default(list)
     def get_external_links(self, media_id):
         """Return all the external links for a given id."""
 
         debug("Fetching all the external links for show id {}".format(media_id))
 
-        external_links = []
-
         self.q.execute(
             "SELECT id, link_type, site, language, url FROM Links WHERE id = ? \
             ORDER BY link_type ASC",
             (media_id,),
         )
 
-        for link in self.q.fetchall():
-            external_link = ExternalLink(*link)
-            external_links.append(external_link)
-
-        return external_links
+        return [ExternalLink(*link) for link in self.q]
 
     # Images
 
@@ -1421,7 +1661,25 @@ class DatabaseDatabase:
         if commit:
             self._db.commit()
 
-    @db_error_default(Image)
+    @db_error
+    def add_images_bulk(self, images: List[Image]):
+        """Add many images in one transaction."""
+
+        if not images:
+            return
+
+        debug("Adding {} images".format(len(images)))
+
+        with self.transaction():
+            self._insert_many(
+                "INSERT INTO Images (id, image_type, image_link) VALUES (?, ?, ?)",
+                [
+                    (image.media_id, image.image_type, image.image_link)
+                    for image in images
+                ],
+            )
+
+    @db_error_default(None)
     def get_banner_image(self, media_id):
         """Retrieve the banner image for a show."""
 
@@ -1440,7 +1698,7 @@ class DatabaseDatabase:
         )
         return banner_image
 
-    @db_error_default(Image)
+    @db_error_default(None)
     def get_cover_image(self, media_id):
         """Retrieve the cover image for a show."""
 
@@ -16,31 +16,22 @@ class ShowType(enum.Enum):
     MUSIC = 7
 
 
+_SHOWTYPES_BY_NAME = {show_type.name.lower(): show_type for show_type in ShowType}
+
+
 def str_to_showtype(string):
     """Convert a show type string to int key."""
 
     if string is not None:
-        string = string.lower()
-        if string == "tv":
-            return ShowType.TV
-        if string == "tv_short":
-            return ShowType.TV_SHORT
-        if string == "movie":
-            return ShowType.MOVIE
-        if string == "special":
-            return ShowType.SPECIAL
-        if string == "ova":
-            return ShowType.OVA
-        if string == "ona":
-            return ShowType.ONA
-        if string == "music":
-            return ShowType.MUSIC
+        return _SHOWTYPES_BY_NAME.get(string.lower(), ShowType.UNKNOWN)
     return ShowType.UNKNOWN
 
 
 class DbEqMixin:
     """Define some helper functions for dealing with Show objects."""
 
+    __slots__ = ()
+
     def __eq__(self, other):
         return self.id == other.id
 
@@ -54,6 +45,23 @@ class DbEqMixin:
 class Show(DbEqMixin):
     """Class to handle Show objects."""
 
+    __slots__ = (
+        "id",
+        "id_mal",
+        "name",
+        "name_en",
+        "type",
+        "has_source",
+        "is_nsfw",
+        "megathread",
+        "enabled",
+        # Filled in by the database after the Show is built
+        "aliases",
+        "external_links",
+        "season",
+        "year",
+    )
+
     def __init__(
         self,
         id,  # pylint: disable=W0622
@@ -81,6 +89,17 @@ class Show(DbEqMixin):
 class Episode:
     """Class to handle Episode objects."""
 
+    __slots__ = (
+        "media_id",
+        "number",
+        "link",
+        "can_edit",
+        "creation_time",
+        # Set when sorting the summary post by name
+        "name",
+        "name_en",
+    )
+
     def __init__(self, media_id, number, link=None, can_edit=True, creation_time=None):
         # Note: arguments are order-sensitive
         self.media_id = media_id
@@ -118,6 +137,8 @@ class Episode:
 class UpcomingEpisode:
     """Class to handle upcoming episodes."""
 
+    __slots__ = ("media_id", "number", "airing_time")
+
     def __init__(self, media_id, number, airing_time):
         # Note: arguments are order-sensitive
         self.media_id = media_id
@@ -133,6 +154,22 @@ class UpcomingEpisode:
 class UnprocessedShow:
     """Class used to define new shows."""
 
+    __slots__ = (
+        "media_id",
+        "id_mal",
+        "name",
+        "name_en",
+        "more_names",
+        "show_type",
+        "has_source",
+        "is_nsfw",
+        "is_airing",
+        "external_links",
+        "images",
+        "season",
+        "year",
+    )
+
     def __init__(
         self,
         media_id,
@@ -176,6 +213,8 @@ class UnprocessedShow:
 class Megathread:
     """Class used to define a megathread."""
 
+    __slots__ = ("media_id", "thread_num", "post_url", "num_episodes")
+
     def __init__(self, media_id, thread_num, post_url, num_episodes):
         self.media_id = media_id
         self.thread_num = thread_num
@@ -191,6 +230,8 @@ class Megathread:
 class ExternalLink:
     """Class used to define an external link for a Show."""
 
+    __slots__ = ("media_id", "link_type", "site", "language", "url")
+
     def __init__(self, media_id, link_type, site, language, url):
         self.media_id = media_id
         self.link_type = link_type.capitalize()
@@ -214,6 +255,8 @@ class ExternalLink:
 class Image:
     """Class used to define an image associated with a show."""
 
+    __slots__ = ("media_id", "image_type", "image_link")
+
     def __init__(self, media_id, image_type, image_link):
         self.media_id = media_id
         self.image_type = image_type
@@ -234,6 +277,8 @@ class Image:
 class PrivateMessage:
     """Class used to define a private message in lemmy"""
 
+    __slots__ = ("sender_id", "message_id", "message_contents")
+
     def __init__(self, sender_id, message_id, message_contents):
         self.sender_id = sender_id
         self.message_id = message_id
@@ -248,6 +293,8 @@ class PrivateMessage:
 class SummaryPost:
     """Class used to define a summary post"""
 
+    __slots__ = ("number", "post_url", "pinned", "creation_time", "last_update")
+
     def __init__(
         self, number, post_url, pinned=False, creation_time=None, last_update=None
     ):
@@ -1,5 +1,6 @@
 """Module with common functions accessed by multiple modules."""
 
+import sqlite3
 import time
 import requests
 
@@ -49,6 +50,34 @@ query ($page: Int, $id_in: [Int]) {
 """
 
 
+def wait_for_ratelimit(ratelimit=60):
+    """
+    Sleep until another AniList api call can be made without exceeding the rate limit,
+    then record the time of the upcoming call.
+
+        Parameters:
+            ratelimit       Maximum number of api calls allowed per minute
+    """
+
+    # The ratelimit may have been changed since the config file was read
+    api_call_times.resize(ratelimit)
+
+    oldest_call = api_call_times.oldest()
+    if oldest_call:
+        delta_ns = time.monotonic_ns() - oldest_call
+
+        debug(
+            "Interval since oldest call is {} seconds".format((delta_ns / 1000000000.0))
+        )
+
+        if delta_ns < min_ns:
+            sleep_secs = (min_ns - delta_ns) / 1000000000.0
+            info("Sleeping {} seconds to respect rate limit.".format(sleep_secs))
+            time.sleep(sleep_secs)
+
+    api_call_times.record(time.monotonic_ns())
+
+
 def add_update_shows_by_id(
     db, show_ids, ratelimit=60, enabled=True, ignore_enabled=False, get_raw_shows=False
 ):
@@ -97,37 +126,53 @@ def add_update_shows_by_id(
     if get_raw_shows:
         return raw_shows
 
+    new_shows = []
+    # One query for every stored id instead of loading each show to see if it exists
+    existing_ids = db.get_show_ids()
     for raw_show in raw_shows:
-        db_show = check_if_exists(db, raw_show.media_id)
-        if db_show:
-            debug("Found show in database, updating")
-            db.update_show(
-                raw_show.media_id, raw_show, commit=True, ignore_enabled=ignore_enabled
-            )
-        else:
+        if raw_show.media_id not in existing_ids:
             debug("Did not find show in database, adding it")
-            db.add_show(raw_show, commit=True)
+            new_shows.append(raw_show)
 
-        if not enabled:
-            debug("Disabling show")
-            show = db.get_show(raw_show.media_id)
-            db.set_show_enabled(show, enabled=False, commit=True)
-
-        for alias in raw_show.more_names:
-            debug("Adding alias for show id {} as {}".format(raw_show.media_id, alias))
-            add_alias(db, raw_show.media_id, alias, commit=True)
-
-        for link in raw_show.external_links:
-            debug("Adding link for show id {}: {}".format(raw_show.media_id, link))
-            db.add_external_link(link, commit=True)
+    try:
+        with db.transaction():
+            for raw_show in raw_shows:
+                if raw_show.media_id in existing_ids:
+                    debug("Found show in database, updating")
+                    db.update_show(
+                        raw_show.media_id,
+                        raw_show,
+                        commit=False,
+                        ignore_enabled=ignore_enabled,
+                    )
+    except sqlite3.OperationalError:
+        error("Database is locked, existing shows were not updated")
+
+    if new_shows:
+        db.add_shows_bulk(new_shows)
+
+    # Shows the bulk insert had to skip can't have aliases, links, or images
+    stored_ids = db.get_show_ids()
+    stored_shows = [s for s in raw_shows if s.media_id in stored_ids]
+
+    if not enabled and stored_shows:
+        db.set_shows_enabled(
+            [raw_show.media_id for raw_show in stored_shows], enabled=False
+        )
 
-        for image in raw_show.images:
-            debug(
-                "Adding image for show id {} at url {}".format(
-                    raw_show.media_id, image.image_link
-                )
-            )
-            db.add_image(image, commit=True)
+    db.add_aliases_bulk(
+        [
+            (raw_show.media_id, alias)
+            for raw_show in stored_shows
+            for alias in raw_show.more_names
+        ]
+    )
+    db.add_external_links_bulk(
+        [link for raw_show in stored_shows for link in raw_show.external_links]
+    )
+    db.add_images_bulk(
+        [image for raw_show in stored_shows for image in raw_show.images]
+    )
 
     return len(raw_shows)
 
@@ -144,28 +189,11 @@ def _get_shows_info(page, show_ids, ratelimit=60):
 
     variables = {"page": page, "id_in": show_ids}
 
-    while len(api_call_times) >= ratelimit:
-        oldest_call = api_call_times.pop()
-        current_time = time.time_ns()
-
-        delta_ns = current_time - oldest_call
-
-        debug(
-            "Interval since oldest call is {} seconds".format((delta_ns / 1000000000.0))
-        )
-
-        if delta_ns > min_ns:
-            break
-
-        sleep_secs = (min_ns - delta_ns) / 1000000000.0
-        info("Sleeping {} seconds to respect rate limit.".format(sleep_secs))
-        time.sleep(sleep_secs)
+    wait_for_ratelimit(ratelimit)
 
     # Make the HTTP API request
     try:
         debug("Making request to AniList for airing times of upcoming shows")
-        debug("Current length of deque is {}".format(len(api_call_times)))
-        api_call_times.appendleft(time.time_ns())
         response = requests.post(
             URL,
             json={"query": paged_show_query, "variables": variables},
@@ -294,44 +322,25 @@ def _get_shows_info(page, show_ids, ratelimit=60):
     return [has_next_page, found_shows]
 
 
-def check_if_exists(db, show_id):
-    """Check if the show is already in the database."""
-
-    debug("Checking database for show id {}".format(show_id))
-    show = db.get_show(id=show_id)
-
-    if show:
-        debug("Found show titled {}".format(show.name))
-        return show
-
-    return None
-
-
-def add_alias(db, show_id, alias, commit=True):
-    """Add an alias for the given show."""
-
-    db.add_alias(show_id=show_id, alias=alias, commit=commit)
-
-
-def meet_discovery_criteria(db, config, media_dict):
+def meet_discovery_criteria(config, media_dict, existing_ids):
     """
     Check if a media item returned by api call meets the discovery criteria. Will also
     return False if show already exists in database.
+
+        Parameters:
+            config          Config object
+            media_dict      Media item from the api response
+            existing_ids    Set of the show ids in the database, from get_show_ids
     """
 
     if not config.show_discovery:
         return False
 
-    existing_show_ids = []
-    db_shows = db.get_shows(enabled="all")
-    for show in db_shows:
-        existing_show_ids.append(show.id)
-
     countries = config.countries
     types = config.new_show_types
     media_type = str_to_showtype(media_dict["format"])
 
-    if media_dict["id"] in existing_show_ids:
+    if media_dict["id"] in existing_ids:
         return False
 
     if media_dict["isAdult"] and not config.nsfw_discovery:
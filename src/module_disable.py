@@ -1,6 +1,7 @@
 """Module to disable a show in the database."""
 
-from logging import info, warning
+import sqlite3
+from logging import error, info, warning
 
 from helper_functions import add_update_shows_by_id
 
@@ -27,10 +28,15 @@ def main(config, db, *args, **kwargs):
             disabled_shows = 0
 
             if shows:
-                for show in shows:
-                    if show.is_nsfw:
-                        db.set_show_enabled(show, enabled=False, commit=True)
-                        disabled_shows += 1
+                try:
+                    with db.transaction():
+                        for show in shows:
+                            if show.is_nsfw:
+                                db.set_show_enabled(show, enabled=False, commit=False)
+                                disabled_shows += 1
+                except sqlite3.OperationalError:
+                    error("Database is locked, no shows were disabled")
+                    return
 
             info("Disabled {} nsfw shows found in the database".format(disabled_shows))
 
@@ -41,9 +47,14 @@ def main(config, db, *args, **kwargs):
             disabled_shows = 0
 
             if shows:
-                for show in shows:
-                    db.set_show_enabled(show, enabled=False, commit=True)
-                    disabled_shows += 1
+                try:
+                    with db.transaction():
+                        for show in shows:
+                            db.set_show_enabled(show, enabled=False, commit=False)
+                            disabled_shows += 1
+                except sqlite3.OperationalError:
+                    error("Database is locked, no shows were disabled")
+                    return
 
             info("Disabled {} shows found in the database".format(disabled_shows))
 
@@ -60,11 +71,18 @@ def main(config, db, *args, **kwargs):
 
                 raw_shows = add_update_shows_by_id(db, show_ids, get_raw_shows=True)
 
-                for raw_show in raw_shows:
-                    if not raw_show.is_airing:
-                        selected_show = db.get_show(id=raw_show.media_id)
-                        db.set_show_enabled(selected_show, enabled=False, commit=True)
-                        disabled_shows += 1
+                try:
+                    with db.transaction():
+                        for raw_show in raw_shows:
+                            if not raw_show.is_airing:
+                                selected_show = db.get_show(id=raw_show.media_id)
+                                db.set_show_enabled(
+                                    selected_show, enabled=False, commit=False
+                                )
+                                disabled_shows += 1
+                except sqlite3.OperationalError:
+                    error("Database is locked, no shows were disabled")
+                    return
 
             info("Disabled {} shows found in the database".format(disabled_shows))
 
@@ -1,11 +1,14 @@
 """Module to get list of series releasing in a given year and season."""
 
 import requests
-import time
 
 from logging import debug, info, error
-from helper_functions import URL, add_update_shows_by_id, meet_discovery_criteria
-from config import min_ns, api_call_times
+from helper_functions import (
+    URL,
+    add_update_shows_by_id,
+    meet_discovery_criteria,
+    wait_for_ratelimit,
+)
 
 SEASON_LIST = ["WINTER", "SPRING", "SUMMER", "FALL"]
 
@@ -123,28 +126,11 @@ def _get_season_shows(db, config, page, season, year, ratelimit=60):
 
     variables = {"page": page, "season": season, "seasonYear": year}
 
-    while len(api_call_times) >= ratelimit:
-        oldest_call = api_call_times.pop()
-        current_time = time.time_ns()
-
-        delta_ns = current_time - oldest_call
-
-        debug(
-            "Interval since oldest call is {} seconds".format((delta_ns / 1000000000.0))
-        )
-
-        if delta_ns > min_ns:
-            break
-
-        sleep_secs = (min_ns - delta_ns) / 1000000000.0
-        info("Sleeping {} seconds to respect rate limit.".format(sleep_secs))
-        time.sleep(sleep_secs)
+    wait_for_ratelimit(ratelimit)
 
     # Make the HTTP API request
     try:
         debug("Making request to AniList for airing times of upcoming shows")
-        debug("Current length of deque is {}".format(len(api_call_times)))
-        api_call_times.appendleft(time.time_ns())
         response = requests.post(
             URL,
             json={"query": paged_season_query, "variables": variables},
@@ -159,9 +145,10 @@ def _get_season_shows(db, config, page, season, year, ratelimit=60):
     found_shows_resp = response["data"]["Page"]["media"]
 
     discovered_shows = []
+    existing_ids = db.get_show_ids()
 
     for found_show in found_shows_resp:
-        if meet_discovery_criteria(db, config, found_show):
+        if meet_discovery_criteria(config, found_show, existing_ids):
             discovered_shows.append(found_show["id"])
 
     return [has_next_page, discovered_shows]
@@ -1,6 +1,7 @@
 """Module to enable a show in the database."""
 
-from logging import info, warning
+import sqlite3
+from logging import error, info, warning
 
 
 def main(config, db, *args, **kwargs):
@@ -21,9 +22,14 @@ def main(config, db, *args, **kwargs):
         shows = db.get_shows(enabled="all")
 
         if shows:
-            for show in shows:
-                db.set_show_enabled(show, enabled=True, commit=True)
-                enabled_shows += 1
+            try:
+                with db.transaction():
+                    for show in shows:
+                        db.set_show_enabled(show, enabled=True, commit=False)
+                        enabled_shows += 1
+            except sqlite3.OperationalError:
+                error("Database is locked, no shows were enabled")
+                return
             info("Enabled {} shows".format(enabled_shows))
         else:
             info("No shows found in database to enable")
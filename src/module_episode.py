@@ -1,5 +1,6 @@
 """Module to find and make discussion threads for show episodes."""
 
+import sqlite3
 import time
 import requests
 
@@ -8,12 +9,12 @@ from datetime import datetime, timezone
 from requests.exceptions import JSONDecodeError
 
 import lemmy
-from config import min_ns, api_call_times
 from helper_functions import (
     URL,
     add_update_shows_by_id,
     meet_discovery_criteria,
     safe_format,
+    wait_for_ratelimit,
 )
 from data.models import (
     UpcomingEpisode,
@@ -134,8 +135,7 @@ def main(config, db, *args, **kwargs):
             edit_history_length = int(4 * 13 / 2)
 
             if len(show_episodes) > 0:
-                show_episodes.sort(key=lambda x: x.number)
-
+                # get_episodes returns them in episode order already
                 for editing_episode in show_episodes[-edit_history_length:]:
                     if lemmy.is_comment_url(editing_episode.link):
                         continue
@@ -266,15 +266,8 @@ def _add_update_upcoming_episodes(db, config):
 
         page += 1
 
-    # Get list of already enabled shows from database
-    enabled_show_ids = []
-    disabled_show_ids = []
-    enabled_shows = db.get_shows()
-    disabled_shows = db.get_shows(enabled="disabled")
-    for show in enabled_shows:
-        enabled_show_ids.append(show.id)
-    for show in disabled_shows:
-        disabled_show_ids.append(show.id)
+    # Get the ids of the shows already in the database, enabled or disabled
+    potential_shows = db.get_show_ids()
 
     # Initialize things to filter out unwanted shows
     discovery = config.show_discovery
@@ -282,7 +275,7 @@ def _add_update_upcoming_episodes(db, config):
     # Filter out shows not matching show type or country of origin, add matching shows
     if discovery:
         for show in found_shows:
-            if meet_discovery_criteria(db, config, show):
+            if meet_discovery_criteria(config, show, potential_shows):
                 debug("Found new show {}. Adding to database.".format(show["id"]))
                 new_show_list.append(show["id"])
 
@@ -290,17 +283,16 @@ def _add_update_upcoming_episodes(db, config):
             db, new_show_list, enabled=config.discovery_enabled
         )
         new_shows += added
-        if config.discovery_enabled:
-            enabled_show_ids = enabled_show_ids + new_show_list
-        else:
-            disabled_show_ids = disabled_show_ids + new_show_list
+        # Re-read rather than trusting new_show_list, some of those shows may not
+        # have made it into the database
+        potential_shows = db.get_show_ids()
 
     # Now with a full list of shows in the database, add the upcoming episodes
-    potential_shows = enabled_show_ids + disabled_show_ids
-    for episode in found_episodes:
-        if episode.media_id in potential_shows:
-            db.add_upcoming_episode(episode)
-            new_episodes += 1
+    upcoming = [
+        episode for episode in found_episodes if episode.media_id in potential_shows
+    ]
+    db.add_upcoming_episodes_bulk(upcoming)
+    new_episodes += len(upcoming)
 
     return [new_episodes, new_shows]
 
@@ -330,28 +322,11 @@ def _get_airing_schedule(page, start, end, ratelimit=60, delay=60):
 
     variables = {"page": page, "start": start, "end": end}
 
-    while len(api_call_times) >= ratelimit:
-        oldest_call = api_call_times.pop()
-        current_time = time.time_ns()
-
-        delta_ns = current_time - oldest_call
-
-        debug(
-            "Interval since oldest call is {} seconds".format((delta_ns / 1000000000.0))
-        )
-
-        if delta_ns > min_ns:
-            break
-
-        sleep_secs = (min_ns - delta_ns) / 1000000000.0
-        info("Sleeping {} seconds to respect rate limit.".format(sleep_secs))
-        time.sleep(sleep_secs)
+    wait_for_ratelimit(ratelimit)
 
     # Make the HTTP API request
     try:
         debug("Making request to AniList for airing times of upcoming shows")
-        debug("Current length of deque is {}".format(len(api_call_times)))
-        api_call_times.appendleft(time.time_ns())
         response = requests.post(
             URL,
             json={"query": paged_airing_query, "variables": variables},
@@ -417,10 +392,6 @@ def _handle_episode_post(db, config, episode, ignore_engagement=False):
 
     created_post = False
     megathread_handled = False
-    disabled_show_ids = []
-    disabled_shows = db.get_shows(enabled="disabled")
-    for show in disabled_shows:
-        disabled_show_ids.append(show.id)
 
     # First, fetch previous episode, if it exists
     show = db.get_show(id=episode.media_id)
@@ -442,14 +413,24 @@ def _handle_episode_post(db, config, episode, ignore_engagement=False):
             return False
 
     # Check if the show is disabled. If so, create the ignored episode
-    if episode.media_id in disabled_show_ids:
+    if show and not show.enabled:
         info(
             "Show id {} marked as disabled. Ignoring aired episode.".format(
                 episode.media_id
             )
         )
-        db.add_ignored_episode(episode)
-        db.remove_upcoming_episode(episode.media_id, episode.number)
+        # Both methods log and swallow their own errors, so check their results and
+        # raise to have the transaction roll the other one back
+        try:
+            with db.transaction():
+                if not db.add_ignored_episode(episode, commit=False):
+                    raise sqlite3.DatabaseError("Could not add ignored episode")
+                if not db.remove_upcoming_episode(
+                    episode.media_id, episode.number, commit=False
+                ):
+                    raise sqlite3.DatabaseError("Could not remove upcoming episode")
+        except sqlite3.Error as e:
+            error("{}, episode {} left as upcoming".format(e, episode))
         return "disabled"
 
     # Next, if this is a new show, make the post and return true
@@ -617,7 +598,7 @@ def _handle_megathread(db, config, episode):
                 can_edit=True,
                 creation_time=post_time,
             )
-            db.increment_num_episodes(megathread)
+            db.increment_num_episodes(megathread.media_id, megathread.thread_num)
             db.remove_upcoming_episode(episode.media_id, episode.number)
 
             return True
@@ -821,9 +802,9 @@ def _format_post_text(config, db, aired_episode, text, **kwargs):
     if "{discussions}" in text:
         text = safe_format(text, discussions=_gen_text_discussions(db, formats, show))
     if "{aliases}" in text:
-        text = safe_format(text, aliases=_gen_text_aliases(db, formats, show))
+        text = safe_format(text, aliases=_gen_text_aliases(formats, show))
     if "{links}" in text:
-        text = safe_format(text, links=_gen_text_links(db, formats, show))
+        text = safe_format(text, links=_gen_text_links(formats, show))
     if "{banner}" in text:
         text = safe_format(text, banner=_gen_text_banner(db, formats, show))
     if "{cover}" in text:
@@ -885,15 +866,16 @@ def _gen_text_discussions(db, formats, show):
         return formats["discussion_none"]
 
 
-def _gen_text_aliases(db, formats, show):
-    aliases = db.get_aliases(show)
+def _gen_text_aliases(formats, show):
+    # get_show already loaded the aliases and links, no need to query them again
+    aliases = show.aliases
     if len(aliases) == 0:
         return ""
     return safe_format(formats["aliases"], aliases=", ".join(aliases))
 
 
-def _gen_text_links(db, formats, show):
-    links = db.get_external_links(show.id)
+def _gen_text_links(formats, show):
+    links = show.external_links
     if len(links) == 0:
         return ""
 
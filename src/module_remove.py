@@ -1,6 +1,7 @@
 """Module to remove a show from the database."""
 
-from logging import info, warning
+import sqlite3
+from logging import error, info, warning
 
 
 def main(config, db, *args, **kwargs):
@@ -16,10 +17,15 @@ def main(config, db, *args, **kwargs):
 
             removed_shows = 0
 
-            for show in shows:
-                if show.is_nsfw:
-                    db.remove_show(show.id)
-                    removed_shows += 1
+            try:
+                with db.transaction():
+                    for show in shows:
+                        if show.is_nsfw:
+                            db.remove_show(show.id, commit=False)
+                            removed_shows += 1
+            except sqlite3.OperationalError:
+                error("Database is locked, no shows were removed")
+                return
 
             info("Removed {} shows marked NSFW in the database.".format(removed_shows))
 
@@ -27,8 +33,12 @@ def main(config, db, *args, **kwargs):
         info("Trying to remove all disabled shows")
         shows = db.get_shows(enabled="disabled")
 
-        for show in shows:
-            db.remove_show(show.id)
+        try:
+            with db.transaction():
+                for show in shows:
+                    db.remove_show(show.id, commit=False)
+        except sqlite3.OperationalError:
+            error("Database is locked, no shows were removed")
 
     else:
         warning("Wrong number of args for add module. Found {} args".format(len(args)))
@@ -154,11 +154,21 @@ def _create_post_contents(config, db):
     title = config.summary_title
 
     recent_episodes = db.get_latest_episodes()
+    shows = {show.id: show for show in db.get_latest_episode_shows()}
+
+    # Leave out episodes whose show couldn't be loaded instead of failing the post
+    listed_episodes = []
+    for episode in recent_episodes:
+        if shows.get(episode.media_id) is None:
+            error("Show id {} not found, skipping its episode".format(episode.media_id))
+            continue
+        listed_episodes.append(episode)
+    recent_episodes = listed_episodes
 
     if config.alphabetize:
 
         for episode in recent_episodes:
-            show = db.get_show(episode.media_id)
+            show = shows[episode.media_id]
             episode.name = show.name
 
             if not show.name_en:
@@ -170,13 +180,13 @@ def _create_post_contents(config, db):
 
     body = safe_format(
         config.summary_body,
-        latest_episodes=_gen_text_latest_episodes(config, db, recent_episodes),
+        latest_episodes=_gen_text_latest_episodes(config, shows, recent_episodes),
     )
 
     return title[:198], body
 
 
-def _gen_text_latest_episodes(config, db, episodes):
+def _gen_text_latest_episodes(config, shows, episodes):
     """Generates the table of latest episode links"""
 
     table_rows = ""
@@ -185,7 +195,7 @@ def _gen_text_latest_episodes(config, db, episodes):
         has_en = False
         is_movie = False
 
-        show = db.get_show(episode.media_id)
+        show = shows[episode.media_id]
 
         if show.type == ShowType.MOVIE.value:
             is_movie = True
@@ -23,7 +23,7 @@ def main(config, args, extra_args):
     """Primary function that calls all other modules as needed."""
 
     # Set things up
-    db = database.open_database(config.database)
+    db = database.open_database(config.database, full_sync=config.full_sync)
     if not db:
         error("Cannot continue running without a database")
         return
@@ -225,7 +225,7 @@ if __name__ == "__main__":
     if args.db_name[0] is not None:
         c.database = args.db_name[0]
     if args.community is not None:
-        c.community = args.community[0]
+        c.l_community = args.community[0]
     if args.lemmy_instance is not None:
         c.l_instance = args.lemmy_instance[0]
 